@@ -13,4 +13,18 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once get_asgi_application has loaded the apps.
+from notifications.consumers import routes as websocket_routes
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        socket = websocket_routes.get(scope['path'])
+        if socket is None:
+            await receive()
+            await send({'type': 'websocket.close'})
+            return
+        return await socket(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -0,0 +1,138 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import Http404
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+
+from app import response_cache
+from app.fast_serializers import ordering_lookups
+from app.renderers import FastJSONRenderer
+
+
+class AsyncAPIView(View):
+    """
+    Read-only JSON view for authenticated users, run on the event loop.
+
+    Does what the DRF generic views do for such GETs (token authentication,
+    the response cache, error bodies), reaching the database through the
+    async ORM and the caches through their async API, so a request neither
+    holds a worker thread nor blocks the loop while it waits.
+    Responses are rendered with FastJSONRenderer only.
+    """
+    serializer_class = None
+    renderer_class = FastJSONRenderer
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Like DRF views, only session authentication would need CSRF checks.
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def get_cache_scopes(self):
+        return None
+
+    async def get_data(self):
+        raise NotImplementedError
+
+    def get_serializer_context(self):
+        return {'request': self.request, 'view': self}
+
+    async def authenticate(self):
+        for authenticator in self.request.authenticators:
+            if hasattr(authenticator, 'aauthenticate'):
+                result = await authenticator.aauthenticate(self.request)
+            else:
+                result = await sync_to_async(authenticator.authenticate)(self.request)
+            if result is not None:
+                self.request.user, self.request.auth = result
+                return
+        self.request.user, self.request.auth = AnonymousUser(), None
+        raise exceptions.NotAuthenticated()
+
+    async def get(self, request, *args, **kwargs):
+        self.request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+        try:
+            await self.authenticate()
+            scopes = await self.get_cache_scopes()
+            if scopes is None:
+                return self.render(await self.get_data())
+
+            etag = await response_cache.aresponse_etag(self.request, self.renderer_class.format, scopes)
+            if response_cache.is_not_modified(self.request, etag):
+                return response_cache.tag(self.finalize(Response(status=status.HTTP_304_NOT_MODIFIED)), etag)
+            data = await response_cache.aget_data(etag)
+            if data is None:
+                data = await self.get_data()
+                await response_cache.aset_data(etag, data)
+            return response_cache.tag(self.render(data), etag)
+        except Exception as exc:
+            return self.handle_exception(exc)
+
+    def render(self, data):
+        return self.finalize(Response(data))
+
+    def finalize(self, response):
+        # Rendered here rather than by the handler, which would do it in a thread.
+        response.accepted_renderer = self.renderer_class()
+        response.accepted_media_type = response.accepted_renderer.media_type
+        response.renderer_context = {'request': self.request, 'view': self, 'response': response}
+        return response.render()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            authenticators = self.request.authenticators
+            auth_header = authenticators[0].authenticate_header(self.request) if authenticators else None
+            if auth_header:
+                exc.auth_header = auth_header
+            else:
+                exc.status_code = status.HTTP_403_FORBIDDEN
+        response = exception_handler(exc, {'request': self.request, 'view': self})
+        if response is None:
+            raise exc
+        return self.finalize(response)
+
+
+class AsyncListAPIView(AsyncAPIView):
+    pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+    values_serializer = None
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    async def get_data(self):
+        paginator = self.pagination_class()
+        queryset = self.get_queryset()
+        if self.values_serializer is not None:
+            queryset = self.values_serializer.values(queryset, *ordering_lookups(paginator))
+        # The page is evaluated the way the async ORM evaluates querysets, on
+        # the thread that holds the request's database connection.
+        page = await sync_to_async(paginator.paginate_queryset)(queryset, self.request, self)
+        if self.values_serializer is not None:
+            return paginator.get_paginated_response(self.values_serializer.serialize(page)).data
+        serializer = self.serializer_class(page, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data).data
+
+
+class AsyncRetrieveAPIView(AsyncAPIView):
+    lookup_field = 'pk'
+    lookup_url_kwarg = None
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    async def get_object(self):
+        queryset = self.get_queryset()
+        lookup = {self.lookup_field: self.kwargs[self.lookup_url_kwarg or self.lookup_field]}
+        try:
+            return await queryset.aget(**lookup)
+        except (ObjectDoesNotExist, ValueError):
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+
+    async def get_data(self):
+        instance = await self.get_object()
+        return self.serializer_class(instance, context=self.get_serializer_context()).data
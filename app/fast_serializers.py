@@ -0,0 +1,146 @@
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.utils import timezone
+from django.utils.functional import cached_property
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+# Fields whose representation of a database value is the value itself.
+IDENTITY_FIELDS = (serializers.CharField, serializers.IntegerField, serializers.BooleanField, serializers.FloatField)
+# Stands for the ISO 8601 representation in the current time zone, bound per call.
+ISO_DATETIME = object()
+
+
+def is_iso_datetime(field):
+    # DateTimeField looks the current time zone up again for every value.
+    return (
+        settings.USE_TZ
+        and type(field).to_representation is serializers.DateTimeField.to_representation
+        and type(field).enforce_timezone is serializers.DateTimeField.enforce_timezone
+        and not hasattr(field, 'timezone')
+        and str(getattr(field, 'format', api_settings.DATETIME_FORMAT)).lower() == ISO_8601
+    )
+
+
+def iso_datetime(tz):
+    def to_representation(value):
+        value = value.astimezone(tz).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return to_representation
+
+
+def compile_plan(serializer, prefix=''):
+    """
+    `(lookups, plan)` reading the fields of a model serializer from
+    `values(*lookups)` rows, the plan holding a `(name, key, to_representation,
+    nested plan)` step per field in the serializer's order.
+    """
+    model = serializer.Meta.model
+    lookups, plan = [], []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            model_field = None
+        if model_field is None or not model_field.concrete:
+            raise ImproperlyConfigured(f"{type(serializer).__name__}.{name} can not be read from values()")
+
+        key = prefix + field.source
+        lookups.append(key)
+        if isinstance(field, serializers.BaseSerializer):
+            if not (model_field.many_to_one or model_field.one_to_one) or isinstance(field, serializers.ListSerializer):
+                raise ImproperlyConfigured(f"{type(serializer).__name__}.{name} can not be read from values()")
+            nested_lookups, nested_plan = compile_plan(field, f'{key}__')
+            lookups += nested_lookups
+            plan.append((name, key, None, nested_plan))
+        elif isinstance(field, serializers.RelatedField):
+            raise ImproperlyConfigured(f"{type(serializer).__name__}.{name} can not be read from values()")
+        elif is_iso_datetime(field):
+            plan.append((name, key, ISO_DATETIME, None))
+        elif any(type(field).to_representation is base.to_representation for base in IDENTITY_FIELDS):
+            plan.append((name, key, None, None))
+        else:
+            plan.append((name, key, field.to_representation, None))
+    return lookups, plan
+
+
+def bind(plan, to_datetime):
+    return [
+        (name, key, to_datetime if to_representation is ISO_DATETIME else to_representation, nested and bind(nested, to_datetime))
+        for name, key, to_representation, nested in plan
+    ]
+
+
+def build(plan, row):
+    data = {}
+    for name, key, to_representation, nested in plan:
+        value = row[key]
+        if value is None:
+            data[name] = None
+        elif nested is not None:
+            data[name] = build(nested, row)
+        elif to_representation is None:
+            data[name] = value
+        else:
+            data[name] = to_representation(value)
+    return data
+
+
+class ValuesSerializer:
+    """
+    Read-only stand-in for a model serializer, rendering the same data from
+    `values()` rows instead of model instances.
+
+    The serializer's fields are walked once into a plan of `values()` lookups
+    and conversions, nested serializers of foreign keys being read through
+    joins. Fields that are not model columns (method fields, properties,
+    reverse relations) can not be planned.
+
+    `prefix` reads the serializer's model through a relation of the listed
+    rows, `'friend__'` rendering the friend of each Friendship row.
+    """
+
+    def __init__(self, serializer_class, prefix=''):
+        self.serializer_class = serializer_class
+        self.prefix = prefix
+
+    @cached_property
+    def compiled(self):
+        return compile_plan(self.serializer_class(), self.prefix)
+
+    def values(self, queryset, *extra):
+        lookups = self.compiled[0]
+        return queryset.values(*dict.fromkeys([*lookups, *extra]))
+
+    def plan(self):
+        return bind(self.compiled[1], iso_datetime(timezone.get_current_timezone()))
+
+    def to_representation(self, row):
+        return build(self.plan(), row)
+
+    def serialize(self, rows):
+        plan = self.plan()
+        return [build(plan, row) for row in rows]
+
+
+def ordering_lookups(paginator):
+    # Cursor pagination reads the position of the last row from its ordering fields.
+    return [field.lstrip('-') for field in getattr(paginator, 'ordering', None) or ()]
+
+
+class ValuesListMixin:
+    """
+    Lists with `values_serializer` from `values()` rows instead of
+    instantiating models and running the nested serializers per row.
+    """
+    values_serializer = None
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.values_serializer.values(self.filter_queryset(self.get_queryset()), *ordering_lookups(self.paginator))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.values_serializer.serialize(page))
+        return Response(self.values_serializer.serialize(queryset))
@@ -0,0 +1,224 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from hmac import compare_digest
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip([*self.buckets, '+Inf'], self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_sum{{{labels}}} {self.sum:.6f}'
+        yield f'{name}_count{{{labels}}} {cumulative}'
+
+
+METRICS = [
+    ('http_request_duration_seconds', "Time from the first middleware to the response.", DURATION_BUCKETS),
+    ('http_request_db_queries', "Database queries run by a request.", QUERY_BUCKETS),
+    ('http_request_db_duration_seconds', "Time a request spent in database queries.", DURATION_BUCKETS),
+    ('http_request_serialization_duration_seconds', "Time in the view and rendering outside database queries.", DURATION_BUCKETS),
+]
+
+
+class Registry:
+    """
+    Histograms of the requests served by this process, per view and method.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.responses = {}
+
+    def record(self, view, method, status, values):
+        with self.lock:
+            if (view, method) not in self.histograms:
+                self.histograms[view, method] = [Histogram(buckets) for name, description, buckets in METRICS]
+            for histogram, value in zip(self.histograms[view, method], values):
+                histogram.observe(value)
+            self.responses[view, method, status] = self.responses.get((view, method, status), 0) + 1
+
+    def exposition(self):
+        lines = []
+        with self.lock:
+            for index, (name, description, buckets) in enumerate(METRICS):
+                lines += [f'# HELP {name} {description}', f'# TYPE {name} histogram']
+                for (view, method), histograms in sorted(self.histograms.items()):
+                    lines += histograms[index].lines(name, f'view="{view}",method="{method}"')
+            lines += ['# HELP http_responses_total Responses by status code.', '# TYPE http_responses_total counter']
+            for (view, method, status), count in sorted(self.responses.items()):
+                lines.append(f'http_responses_total{{view="{view}",method="{method}",status="{status}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        with self.lock:
+            self.histograms.clear()
+            self.responses.clear()
+
+
+registry = Registry()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_duration = 0
+        self.view_started = None
+        self.view_db_duration = 0
+        self.serialization_duration = 0
+
+
+current = ContextVar('request_metrics', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_duration += time.perf_counter() - started
+
+
+def instrument(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(instrument)
+
+
+class MetricsMiddleware:
+    """
+    Records the latency, query count, database time and serialization time
+    of every request in `registry`, and logs requests over the query or
+    latency budget (METRICS_QUERY_BUDGET, METRICS_LATENCY_BUDGET).
+
+    Database work is counted through an execute wrapper on every connection
+    and a context variable, which also follows async views into the threads
+    running their queries. Serialization is the time between the view being
+    called and its response being rendered, less the queries run meanwhile.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        for connection in connections.all(initialized_only=True):
+            instrument(connection)
+        # Hooks of the other mode would cost a thread switch per request.
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            self.process_view = self.aprocess_view
+            self.process_template_response = self.aprocess_template_response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current.reset(token)
+        self.record(request, response, metrics)
+        return response
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current.reset(token)
+        self.record(request, response, metrics)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.view_started()
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        self.view_started()
+
+    def process_template_response(self, request, response):
+        return self.view_finished(response)
+
+    async def aprocess_template_response(self, request, response):
+        return self.view_finished(response)
+
+    def view_started(self):
+        metrics = current.get()
+        if metrics is not None:
+            metrics.view_started = time.perf_counter()
+            metrics.view_db_duration = metrics.db_duration
+
+    def view_finished(self, response):
+        metrics = current.get()
+        if metrics is None or metrics.view_started is None:
+            return response
+
+        def rendered(response):
+            metrics.serialization_duration = (
+                time.perf_counter() - metrics.view_started - (metrics.db_duration - metrics.view_db_duration)
+            )
+
+        if response.is_rendered:
+            rendered(response)
+        else:
+            response.add_post_render_callback(rendered)
+        return response
+
+    def record(self, request, response, metrics):
+        duration = time.perf_counter() - metrics.started
+        match = request.resolver_match
+        view = match.view_name if match else 'unmatched'
+        registry.record(view, request.method, response.status_code, [
+            duration, metrics.queries, metrics.db_duration, metrics.serialization_duration,
+        ])
+        if metrics.queries > settings.METRICS_QUERY_BUDGET or duration > settings.METRICS_LATENCY_BUDGET:
+            logger.warning(
+                "%s %s (%s) took %.3fs with %d queries, %.3fs in the database",
+                request.method, request.get_full_path(), view, duration, metrics.queries, metrics.db_duration,
+            )
+
+
+def metrics_view(request):
+    """
+    The registry in the Prometheus text format, for scrapers holding the
+    METRICS_TOKEN bearer token. Without a token it is only served in DEBUG.
+    """
+    if settings.METRICS_TOKEN:
+        authorization = request.headers.get('Authorization', '')
+        if not compare_digest(authorization.encode(), f'Bearer {settings.METRICS_TOKEN}'.encode()):
+            return HttpResponseForbidden()
+    elif not settings.DEBUG:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
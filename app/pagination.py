@@ -0,0 +1,37 @@
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination over `(created_at, pk)`, newest first.
+
+    The cursor stores the last seen `created_at`, so every page is a range scan
+    on the matching `(…, created_at, pk)` index whatever its depth; the primary
+    key breaks ties between rows created in the same instant.
+    """
+    ordering = ('-created_at', '-pk')
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def first_page(self, rows, url):
+        """
+        Pages the first `page_size + 1` rows of the list at `url` like
+        `paginate_queryset` would, for responses embedding that first page.
+        """
+        self.base_url = url
+        self.cursor = None
+        self.page = list(rows[:self.page_size])
+        self.has_previous = False
+        self.has_next = len(rows) > self.page_size
+        if self.has_next:
+            self.next_position = self._get_position_from_instance(rows[self.page_size], self.ordering)
+        return self.page
+
+
+class StartedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination over `(started_at, pk)`, soonest first.
+    """
+    ordering = ('started_at', 'pk')
+    page_size_query_param = 'page_size'
+    max_page_size = 200
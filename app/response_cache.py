@@ -0,0 +1,128 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def version_key(scope):
+    return f'response-version:{scope}'
+
+
+def versions(scopes):
+    """
+    Current version token of each scope, scopes never bumped get one now.
+    """
+    cache = caches[settings.RESPONSE_CACHE]
+    keys = [version_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, uuid.uuid4().hex, None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+async def aversions(scopes):
+    cache = caches[settings.RESPONSE_CACHE]
+    keys = [version_key(scope) for scope in scopes]
+    found = await cache.aget_many(keys)
+    for key in keys:
+        if key not in found:
+            await cache.aadd(key, uuid.uuid4().hex, None)
+            found[key] = await cache.aget(key)
+    return [found[key] for key in keys]
+
+
+def bump(*scopes):
+    token = uuid.uuid4().hex
+    caches[settings.RESPONSE_CACHE].set_many({version_key(scope): token for scope in scopes}, None)
+
+
+def bump_on_commit(*scopes):
+    """
+    Bumps the scopes now and once more after commit, so a response read while
+    the transaction was still open is not kept under the new version.
+    """
+    bump(*scopes)
+    transaction.on_commit(lambda: bump(*scopes))
+
+
+def make_etag(request, renderer_format, scope_versions):
+    key = '\n'.join([
+        str(request.user.pk),
+        request.get_full_path(),
+        renderer_format,
+        *scope_versions,
+    ])
+    return f'"{hashlib.sha1(key.encode()).hexdigest()}"'
+
+
+def response_etag(request, renderer_format, scopes):
+    return make_etag(request, renderer_format, versions(scopes))
+
+
+async def aresponse_etag(request, renderer_format, scopes):
+    return make_etag(request, renderer_format, await aversions(scopes))
+
+
+def is_not_modified(request, etag):
+    if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+    return etag in if_none_match or '*' in if_none_match
+
+
+def get_data(etag):
+    return caches[settings.RESPONSE_CACHE].get(f'response:{etag}')
+
+
+def set_data(etag, data):
+    caches[settings.RESPONSE_CACHE].set(f'response:{etag}', data, settings.RESPONSE_CACHE_TIMEOUT)
+
+
+async def aget_data(etag):
+    return await caches[settings.RESPONSE_CACHE].aget(f'response:{etag}')
+
+
+async def aset_data(etag, data):
+    await caches[settings.RESPONSE_CACHE].aset(f'response:{etag}', data, settings.RESPONSE_CACHE_TIMEOUT)
+
+
+def tag(response, etag):
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+class CachedResponseMixin:
+    """
+    Caches the data of successful GET responses per viewer, URL and version
+    of the scopes from `get_cache_scopes`, and answers `If-None-Match` with
+    304 when none of the scopes were bumped since.
+
+    Views return None from `get_cache_scopes` to skip the cache.
+    """
+
+    def get_cache_scopes(self):
+        return None
+
+    def get(self, request, *args, **kwargs):
+        scopes = self.get_cache_scopes()
+        if scopes is None:
+            return super().get(request, *args, **kwargs)
+
+        etag = response_etag(request, request.accepted_renderer.format, scopes)
+        if is_not_modified(request, etag):
+            return tag(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+        data = get_data(etag)
+        if data is not None:
+            return tag(Response(data), etag)
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            set_data(etag, response.data)
+            tag(response, etag)
+        return response
@@ -43,8 +43,9 @@ INSTALLED_APPS = [
 
     'users',
     'plans',
+    'search',
+    'notifications',
 
-    'debug_toolbar',
     'rest_framework',
     'knox',
     "corsheaders",
@@ -57,6 +58,7 @@ INTERNAL_IPS = [
 AUTH_USER_MODEL = "users.User"
 
 MIDDLEWARE = [
+    'app.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     "corsheaders.middleware.CorsMiddleware",
@@ -65,9 +67,13 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+# The toolbar is a development dependency, production images do not have it.
+if DEBUG:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
 ROOT_URLCONF = 'app.urls'
 
 TEMPLATES = [
@@ -98,6 +104,25 @@ DATABASES = {
     'default': env.db(default='sqlite:///db.sqlite3'),
 }
 
+# Requests on PostgreSQL borrow connections from a psycopg pool per process,
+# which also works under ASGI, where each request runs in a thread of its own
+# and persistent connections would pile up. Other databases keep connections
+# open for CONN_MAX_AGE seconds between requests instead.
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql' and env('DATABASE_POOL', bool, True):
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'min_size': env('DATABASE_POOL_MIN_SIZE', int, 2),
+        'max_size': env('DATABASE_POOL_MAX_SIZE', int, 10),
+        'timeout': env('DATABASE_POOL_TIMEOUT', float, 10),
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = env('CONN_MAX_AGE', int, 60)
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://?max_entries=10000'),
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -143,8 +168,14 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'knox.auth.TokenAuthentication',
-    ]
+        'users.authentication.CachedTokenAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'app.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'app.pagination.CreatedAtCursorPagination',
+    'PAGE_SIZE': 50,
 }
 
 REST_KNOX = {
@@ -153,6 +184,56 @@ REST_KNOX = {
   'AUTH_HEADER_PREFIX': 'Token',
 }
 
+# Cache alias and lifetime in seconds of verified Knox tokens.
+KNOX_TOKEN_CACHE = env('KNOX_TOKEN_CACHE', str, 'default')
+KNOX_TOKEN_CACHE_TIMEOUT = env('KNOX_TOKEN_CACHE_TIMEOUT', int, 300)
+
 CORS_ALLOWED_ORIGINS = env('CORS_ALLOWED_ORIGINS', list, ['http://127.0.0.1:8000', 'http://localhost:4200'])
 
 TELEGRAM_BOT_TOKEN = env('TELEGRAM_BOT_TOKEN', str, '8135285644:AAHHvKbxLNkFdGc35LOyhXVx7Zq1c9xFKKw')
+
+# Web app init data older than this many seconds is refused.
+TELEGRAM_AUTH_MAX_AGE = env('TELEGRAM_AUTH_MAX_AGE', int, 86400)
+
+# Events of creators with more friends than this are not copied into friends'
+# timelines on write, the friends' events feed pulls them at read time instead.
+TIMELINE_FANOUT_LIMIT = env('TIMELINE_FANOUT_LIMIT', int, 1000)
+
+# Number of users whose friend sets are cached in each process, and the cache
+# alias holding their versions, shared by all processes.
+FRIENDSHIP_GRAPH_CACHE_SIZE = env('FRIENDSHIP_GRAPH_CACHE_SIZE', int, 10000)
+FRIENDSHIP_GRAPH_CACHE = env('FRIENDSHIP_GRAPH_CACHE', str, 'default')
+
+# Work caps of the friend-of-friend traversal behind friend suggestions.
+FRIEND_SUGGESTIONS_MAX_FRIENDS = env('FRIEND_SUGGESTIONS_MAX_FRIENDS', int, 200)
+FRIEND_SUGGESTIONS_MAX_EDGES = env('FRIEND_SUGGESTIONS_MAX_EDGES', int, 10000)
+
+# Longest time window the calendar endpoint answers for.
+CALENDAR_MAX_DAYS = env('CALENDAR_MAX_DAYS', int, 62)
+
+# Cache alias and lifetime in seconds of cached API responses, see
+# `app.response_cache`.
+RESPONSE_CACHE = env('RESPONSE_CACHE', str, 'default')
+RESPONSE_CACHE_TIMEOUT = env('RESPONSE_CACHE_TIMEOUT', int, 300)
+
+# Profile changes of users with more friends than this do not bump the cached
+# friends lists of each friend, those lists catch up on their next change of
+# friends.
+RESPONSE_CACHE_FANOUT_LIMIT = env('RESPONSE_CACHE_FANOUT_LIMIT', int, 1000)
+
+# Dotted path of the broker behind the updates socket, see
+# `notifications.brokers`.
+PUSH_BROKER = env('PUSH_BROKER', str, 'notifications.brokers.InMemoryBroker')
+
+# Serve the read-heavy profile, friends and events endpoints with the async
+# views, for ASGI deployments; WSGI ones are better off with the sync views.
+ASYNC_API_VIEWS = env('ASYNC_API_VIEWS', bool, True)
+
+# Requests running more queries or taking longer in seconds are logged, see
+# `app.metrics`.
+METRICS_QUERY_BUDGET = env('METRICS_QUERY_BUDGET', int, 20)
+METRICS_LATENCY_BUDGET = env('METRICS_LATENCY_BUDGET', float, 0.5)
+
+# Bearer token required to scrape /metrics, which is only served in DEBUG when
+# empty.
+METRICS_TOKEN = env('METRICS_TOKEN', str, '')
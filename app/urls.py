@@ -14,14 +14,29 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from debug_toolbar.toolbar import debug_toolbar_urls
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path
 from django.views.generic import TemplateView
 from knox import views as knox_views
 
-from plans.views import UserEventsListView, AddUserEventView
-from users.views import LoginView, UserView, AuthUserView, UserFriendsView, UserFriendRequestsView, TelegramLoginView
+from app.metrics import metrics_view
+
+from plans.views import (
+    UserEventsListView, AsyncUserEventsListView, AddUserEventView, AddUserEventsBatchView, UserFriendsEventsListView,
+    NearbyEventsListView, UserCalendarView, EventView, EventAttendeesListView, EventRequestsListView,
+    EventRequestView,
+)
+from search.views import SearchView
+from users.views import (
+    LoginView, UserView, AsyncUserView, AuthUserView, AsyncAuthUserView, UserFriendsView, AsyncUserFriendsView,
+    UserFriendRequestsView, AsyncUserFriendRequestsView, TelegramLoginView, UserFriendSuggestionsView,
+    UserMutualFriendsView,
+)
+
+
+def api_view(sync_view, async_view):
+    return (async_view if settings.ASYNC_API_VIEWS else sync_view).as_view()
 
 
 urlpatterns = [
@@ -30,18 +45,29 @@ urlpatterns = [
     path('api/auth/login/', LoginView.as_view(), name='knox_login'),
     path('api/auth/logout/', knox_views.LogoutView.as_view(), name='knox_logout'),
     path('api/auth/logoutall/', knox_views.LogoutAllView.as_view(), name='knox_logoutall'),
-    path('api/user/me/', AuthUserView.as_view(), name='my_detail'),
-    path('api/user/friends/', UserFriendsView.as_view(), name='my_friends'),
-    path('api/user/friends/requests/', UserFriendRequestsView.as_view(), name='my_friends_requests'),
-    path('api/user/events/', UserEventsListView.as_view(), name='my_events'),
+    path('api/user/me/', api_view(AuthUserView, AsyncAuthUserView), name='my_detail'),
+    path('api/user/friends/', api_view(UserFriendsView, AsyncUserFriendsView), name='my_friends'),
+    path('api/user/friends/events/', UserFriendsEventsListView.as_view(), name='my_friends_events'),
+    path('api/user/friends/requests/', api_view(UserFriendRequestsView, AsyncUserFriendRequestsView), name='my_friends_requests'),
+    path('api/user/friends/suggestions/', UserFriendSuggestionsView.as_view(), name='my_friend_suggestions'),
+    path('api/user/events/', api_view(UserEventsListView, AsyncUserEventsListView), name='my_events'),
     path('api/user/events/add/', AddUserEventView.as_view(), name='my_events_add'),
-    path('api/user/<uuid:user_uuid>/', UserView.as_view(), name='user_detail'),
+    path('api/user/events/batch/', AddUserEventsBatchView.as_view(), name='my_events_batch'),
+    path('api/user/calendar/', UserCalendarView.as_view(), name='my_calendar'),
+    path('api/search/', SearchView.as_view(), name='search'),
+    path('api/events/nearby/', NearbyEventsListView.as_view(), name='nearby_events'),
+    path('api/events/<int:event_id>/', EventView.as_view(), name='event_detail'),
+    path('api/events/<int:event_id>/attendees/', EventAttendeesListView.as_view(), name='event_attendees'),
+    path('api/events/<int:event_id>/requests/', EventRequestsListView.as_view(), name='event_requests'),
+    path('api/events/<int:event_id>/requests/<int:request_id>/', EventRequestView.as_view(), name='event_request'),
+    path('api/user/<uuid:user_uuid>/', api_view(UserView, AsyncUserView), name='user_detail'),
+    path('api/user/<uuid:user_uuid>/mutual_friends/', UserMutualFriendsView.as_view(), name='user_mutual_friends'),
+    path('metrics', metrics_view, name='metrics'),
     path('', TemplateView.as_view(template_name="index.html"), name='index'),
     # path('login/', UserLoginView.as_view(), name='login'),
     # path('logout/', UserLogoutView.as_view(), name='logout'),
     # path('me/', MyProfileView.as_view(), name='my_profile'),
     # path('friends/', MyFriendsView.as_view(), name='my_friends'),
-    # path('friends/plans/', UserFriendsEventsListView.as_view(), name='my_friends_plans'),
     # path('friends/requests/', FriendshipRequestListView.as_view(), name='friendship_requests'),
     # path('friends/requests/<int:request_id>/', FriendshipRequestDetailView.as_view(), name='friendship_request'),
     # path('plans/', MyEventsListView.as_view(), name='my_plans'),
@@ -52,4 +78,8 @@ urlpatterns = [
     # path('user/<uuid:user_uuid>/', UserProfileView.as_view(), name='user_profile'),
     # path('user/<uuid:user_uuid>/friendship_request/', FriendshipRequestView.as_view(), name='user_profile_friendship_request'),
 
-] + debug_toolbar_urls()
+]
+
+if 'debug_toolbar' in settings.INSTALLED_APPS:
+    from debug_toolbar.toolbar import debug_toolbar_urls
+    urlpatterns += debug_toolbar_urls()
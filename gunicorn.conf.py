@@ -0,0 +1,46 @@
+"""
+Gunicorn settings of the production server, tuned from the environment.
+
+    gunicorn app.asgi:application
+
+Workers run the ASGI application with uvicorn, which also serves the updates
+socket and the async views. Each worker is one process and one event loop,
+sync views run in its thread pool.
+
+The default locmem cache and the in-memory push broker live in the worker
+process, and so do the friend sets of the friendship graph, which learn of
+changes made by other workers through versions kept in the cache. Run more
+than one worker or container only with a shared CACHE_URL (with
+FRIENDSHIP_GRAPH_CACHE and RESPONSE_CACHE pointing at it) and PUSH_BROKER;
+several workers refuse to start while FRIENDSHIP_GRAPH_CACHE is process-local.
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'uvicorn_worker.UvicornWorker')
+# Only used by the gthread worker class, uvicorn workers size their pool from ASGI_THREADS.
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+# Recycling workers now and then bounds the growth of in-process caches.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 1000))
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+
+def on_starting(server):
+    if server.cfg.workers < 2:
+        return
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    import django
+    django.setup()
+    from django.conf import settings
+    from users.checks import is_process_local
+    if is_process_local(settings.FRIENDSHIP_GRAPH_CACHE):
+        raise RuntimeError(
+            f"WEB_CONCURRENCY={server.cfg.workers} needs a shared FRIENDSHIP_GRAPH_CACHE, "
+            f"'{settings.FRIENDSHIP_GRAPH_CACHE}' is local to each worker"
+        )
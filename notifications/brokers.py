@@ -0,0 +1,92 @@
+import asyncio
+import threading
+from functools import cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class Broker:
+    """
+    Delivers messages published for a user to that user's open subscriptions.
+
+    `publish` is called from synchronous code, `subscribe` from the event loop
+    serving the socket. Deployments running several processes need a broker
+    backed by a shared pub/sub service, selected with the PUSH_BROKER setting.
+    """
+
+    def publish(self, user_id, message):
+        raise NotImplementedError
+
+    def has_subscribers(self, user_id):
+        """
+        Whether a message for the user may be delivered, so publishers skip
+        building it otherwise. Brokers that can not tell cheaply say True.
+        """
+        return True
+
+    def subscribe(self, user_id):
+        """
+        A Subscription whose `get` awaits the next message; `close` it when
+        the socket goes away.
+        """
+        raise NotImplementedError
+
+
+class Subscription:
+    def __init__(self, broker, user_id, maxsize):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+
+    def put(self, message):
+        # A client too slow to keep up loses messages rather than memory, it
+        # reloads the lists on reconnect anyway.
+        if not self.queue.full():
+            self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InMemoryBroker(Broker):
+    """
+    Broker for a single process: subscriptions are queues on the event loop
+    that opened them, publishers hand messages over thread-safely.
+    """
+
+    def __init__(self, maxsize=100):
+        self.maxsize = maxsize
+        self.subscriptions = {}
+        self.lock = threading.Lock()
+
+    def publish(self, user_id, message):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.loop.call_soon_threadsafe(subscription.put, message)
+
+    def has_subscribers(self, user_id):
+        return user_id in self.subscriptions
+
+    def subscribe(self, user_id):
+        subscription = Subscription(self, user_id, self.maxsize)
+        with self.lock:
+            self.subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self.subscriptions.pop(subscription.user_id, None)
+
+
+@cache
+def get_broker():
+    return import_string(settings.PUSH_BROKER)()
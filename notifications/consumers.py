@@ -0,0 +1,82 @@
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from rest_framework import exceptions
+
+from notifications.brokers import get_broker
+from users.authentication import CachedTokenAuthentication
+
+# Close code sent when the token is missing or invalid.
+UNAUTHORIZED = 4401
+
+
+@sync_to_async
+def authenticate(token):
+    close_old_connections()
+    try:
+        user, auth_token = CachedTokenAuthentication().authenticate_credentials(token.encode())
+        return user
+    except exceptions.AuthenticationFailed:
+        return None
+    finally:
+        close_old_connections()
+
+
+def get_token(scope):
+    """
+    The Knox token of the `Authorization: Token …` header, or of the `token`
+    query parameter for browsers, which cannot set headers on sockets.
+    """
+    for name, value in scope.get('headers', []):
+        if name == b'authorization':
+            prefix, _, token = value.decode('latin-1').partition(' ')
+            if prefix == 'Token' and token:
+                return token
+    tokens = parse_qs(scope.get('query_string', b'').decode('latin-1')).get('token')
+    return tokens[0] if tokens else None
+
+
+async def updates_socket(scope, receive, send):
+    """
+    WebSocket pushing the friendship and attendee request updates of the
+    authenticated user as JSON text frames, see `notifications.receivers`.
+    """
+    if (await receive())['type'] != 'websocket.connect':
+        return
+    token = get_token(scope)
+    user = await authenticate(token) if token else None
+    if user is None:
+        await send({'type': 'websocket.close', 'code': UNAUTHORIZED})
+        return
+
+    subscription = get_broker().subscribe(user.pk)
+    try:
+        await send({'type': 'websocket.accept'})
+
+        async def push():
+            while True:
+                await send({'type': 'websocket.send', 'text': json.dumps(await subscription.get())})
+
+        async def drain():
+            # Clients have nothing to say, wait for them to leave.
+            while (await receive())['type'] != 'websocket.disconnect':
+                pass
+
+        tasks = [asyncio.create_task(push()), asyncio.create_task(drain())]
+        try:
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+        for task in done:
+            task.result()
+    finally:
+        subscription.close()
+
+
+routes = {
+    '/ws/updates/': updates_socket,
+}
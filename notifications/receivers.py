@@ -0,0 +1,58 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from notifications.brokers import get_broker
+from plans.models import EventAttendeeRequest
+from plans.signals import attendee_request_answered
+from plans.serializers import AttendeeRequestPushSerializer
+from users.models import FriendshipRequest
+from users.serializers import FriendshipRequestSerializer
+from users.signals import friendship_request_answered, friendship_request_cancelled
+
+
+def action(instance, created):
+    if created:
+        return 'created'
+    if instance.accepted_at:
+        return 'accepted'
+    if instance.rejected_at:
+        return 'rejected'
+    return 'updated'
+
+
+def publish_on_commit(user_id, kind, action, serializer):
+    def publish():
+        # Serialized only when someone is listening.
+        broker = get_broker()
+        if broker.has_subscribers(user_id):
+            broker.publish(user_id, {'type': kind, 'action': action, 'data': serializer.data})
+    transaction.on_commit(publish)
+
+
+@receiver(post_save, sender=FriendshipRequest)
+def friendship_request_saved(sender, instance, created, **kwargs):
+    # New requests go to their receiver, answers back to their sender.
+    user_id = instance.receiver_id if created else instance.sender_id
+    publish_on_commit(user_id, 'friendship_request', action(instance, created), FriendshipRequestSerializer(instance))
+
+
+@receiver(friendship_request_answered, sender=FriendshipRequest)
+def friendship_request_answered_handler(sender, instance, **kwargs):
+    publish_on_commit(instance.sender_id, 'friendship_request', action(instance, False), FriendshipRequestSerializer(instance))
+
+
+@receiver(friendship_request_cancelled, sender=FriendshipRequest)
+def friendship_request_cancelled_handler(sender, instance, **kwargs):
+    publish_on_commit(instance.receiver_id, 'friendship_request', 'cancelled', FriendshipRequestSerializer(instance))
+
+
+@receiver(post_save, sender=EventAttendeeRequest)
+def event_attendee_request_saved(sender, instance, created, **kwargs):
+    user_id = instance.event.creator_id if created else instance.sender_id
+    publish_on_commit(user_id, 'event_attendee_request', action(instance, created), AttendeeRequestPushSerializer(instance))
+
+
+@receiver(attendee_request_answered, sender=EventAttendeeRequest)
+def event_attendee_request_answered(sender, instance, **kwargs):
+    publish_on_commit(instance.sender_id, 'event_attendee_request', action(instance, False), AttendeeRequestPushSerializer(instance))
@@ -0,0 +1,113 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase
+from knox.models import AuthToken
+
+from app.asgi import application
+from plans.models import Event, EventAttendeeRequest
+from users.models import User, FriendshipRequest
+
+
+class Socket:
+    """
+    Drives an ASGI websocket application like a server would.
+    """
+
+    def __init__(self, path, query_string=b''):
+        self.inbox = asyncio.Queue()
+        self.outbox = asyncio.Queue()
+        scope = {'type': 'websocket', 'path': path, 'query_string': query_string, 'headers': []}
+        self.task = asyncio.create_task(application(scope, self.inbox.get, self.outbox.put))
+
+    async def connect(self):
+        await self.inbox.put({'type': 'websocket.connect'})
+        return await self.receive()
+
+    async def receive(self):
+        return await asyncio.wait_for(self.outbox.get(), 1)
+
+    async def receive_json(self):
+        return json.loads((await self.receive())['text'])
+
+    async def disconnect(self):
+        await self.inbox.put({'type': 'websocket.disconnect', 'code': 1000})
+        await asyncio.wait_for(self.task, 1)
+
+
+class UpdatesSocketTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('user@example.com')
+        self.sender = User.objects.create_user('sender@example.com')
+        auth_token, self.token = AuthToken.objects.create(user=self.user)
+
+    def committed(self, function, *args, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return function(*args, **kwargs)
+
+    async def test_rejects_missing_or_bad_token(self):
+        for query_string in [b'', b'token=bad']:
+            socket = Socket('/ws/updates/', query_string)
+            self.assertEqual((await socket.connect())['type'], 'websocket.close')
+            await asyncio.wait_for(socket.task, 1)
+
+    async def test_unknown_path_is_closed(self):
+        socket = Socket('/ws/nothing/')
+        self.assertEqual((await socket.connect())['type'], 'websocket.close')
+
+    async def test_pushes_friendship_requests(self):
+        socket = Socket('/ws/updates/', f'token={self.token}'.encode())
+        self.assertEqual((await socket.connect())['type'], 'websocket.accept')
+
+        friendship_request = await sync_to_async(self.committed)(
+            FriendshipRequest.objects.create, sender=self.sender, receiver=self.user, comment='Hi',
+        )
+        message = await socket.receive_json()
+        self.assertEqual((message['type'], message['action']), ('friendship_request', 'created'))
+        self.assertEqual(message['data']['comment'], 'Hi')
+
+        # Answers go to the sender, who is not connected.
+        await sync_to_async(self.committed)(friendship_request.reject)
+        await asyncio.sleep(0)
+        self.assertTrue(socket.outbox.empty())
+        await socket.disconnect()
+
+    async def test_pushes_event_attendee_requests(self):
+        socket = Socket('/ws/updates/', f'token={self.token}'.encode())
+        await socket.connect()
+        event = await Event.objects.acreate(creator=self.user, title='Party')
+        await sync_to_async(self.committed)(EventAttendeeRequest.objects.create, event=event, sender=self.sender)
+        message = await socket.receive_json()
+        self.assertEqual((message['type'], message['action']), ('event_attendee_request', 'created'))
+        self.assertEqual(message['data']['event'], event.pk)
+        self.assertEqual(message['data']['sender']['email'], 'sender@example.com')
+        await socket.disconnect()
+
+    async def test_pushes_cancellations_only(self):
+        socket = Socket('/ws/updates/', f'token={self.token}'.encode())
+        await socket.connect()
+        friendship_request = await FriendshipRequest.objects.acreate(sender=self.sender, receiver=self.user)
+        await sync_to_async(self.committed)(friendship_request.cancel)
+        message = await socket.receive_json()
+        self.assertEqual((message['type'], message['action']), ('friendship_request', 'cancelled'))
+
+        # Requests deleted along with their sender are not cancellations.
+        await FriendshipRequest.objects.acreate(sender=self.sender, receiver=self.user)
+        await sync_to_async(self.committed)(self.sender.delete)
+        await asyncio.sleep(0)
+        self.assertTrue(socket.outbox.empty())
+        await socket.disconnect()
+
+    def test_publishing_does_not_read_the_event(self):
+        event = Event.objects.only('pk', 'creator').get(pk=Event.objects.create(creator=self.user, title='Party').pk)
+        with self.assertNumQueries(1):
+            attendee_request = EventAttendeeRequest.objects.create(event=event, sender=self.sender)
+        with self.assertNumQueries(1):
+            attendee_request.reject()
+
+    def test_nothing_is_serialized_without_subscribers(self):
+        event = Event.objects.create(creator=self.user, title='Party')
+        # The sender is not loaded, serializing the request would read it.
+        with self.assertNumQueries(1):
+            self.committed(EventAttendeeRequest.objects.create, event=event, sender_id=self.sender.pk)
@@ -0,0 +1,95 @@
+import math
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+PRECISION = 12
+EARTH_RADIUS = 6371008.8
+
+
+def encode(lat, long, precision=PRECISION):
+    lat_range = [-90.0, 90.0]
+    long_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(geohash) < precision:
+        value, interval = (long, long_range) if even else (lat, lat_range)
+        middle = (interval[0] + interval[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(geohash)
+
+
+def cell_size(precision):
+    """
+    Height and width in degrees of a geohash cell of the given precision.
+    """
+    long_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180 / 2 ** lat_bits, 360 / 2 ** long_bits
+
+
+def bounding_boxes(lat, long, radius):
+    """
+    Smallest (min_lat, min_long, max_lat, max_long) boxes holding the circle
+    of `radius` meters around a point: one box, or two when the circle
+    crosses the antimeridian, split there. Latitudes are clipped to the poles.
+    """
+    delta_lat = math.degrees(radius / EARTH_RADIUS)
+    cos_lat = math.cos(math.radians(lat))
+    delta_long = 180.0 if cos_lat < 1e-9 else min(180.0, delta_lat / cos_lat)
+    min_lat, max_lat = max(-90.0, lat - delta_lat), min(90.0, lat + delta_lat)
+    if delta_long >= 180.0:
+        return [(min_lat, -180.0, max_lat, 180.0)]
+    min_long, max_long = long - delta_long, long + delta_long
+    if min_long < -180.0:
+        return [(min_lat, -180.0, max_lat, max_long), (min_lat, min_long + 360.0, max_lat, 180.0)]
+    if max_long > 180.0:
+        return [(min_lat, min_long, max_lat, 180.0), (min_lat, -180.0, max_lat, max_long - 360.0)]
+    return [(min_lat, min_long, max_lat, max_long)]
+
+
+def covering_prefixes(min_lat, min_long, max_lat, max_long, max_cells=16):
+    """
+    Geohash prefixes whose cells together cover the box.
+
+    Uses the longest precision that needs at most `max_cells` cells, so each
+    prefix is a short range scan on the geohash index.
+    """
+    for precision in range(PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        rows = math.floor(max_lat / height) - math.floor(min_lat / height) + 1
+        columns = math.floor(max_long / width) - math.floor(min_long / width) + 1
+        if rows * columns <= max_cells:
+            break
+    else:
+        return ['']
+
+    prefixes = set()
+    for row in range(rows):
+        lat = min(max_lat, min_lat + row * height)
+        for column in range(columns):
+            long = min(max_long, min_long + column * width)
+            prefixes.add(encode(lat, long, precision))
+    return sorted(prefixes)
+
+
+def distance(lat1, long1, lat2, long2):
+    """
+    Great-circle distance in meters.
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(long2 - long1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(a))
@@ -0,0 +1,232 @@
+import hashlib
+import hmac
+import json
+import logging
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import timedelta
+from urllib.parse import urlencode
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import URLPattern, get_resolver, reverse
+from django.utils import timezone
+from knox.models import AuthToken
+
+from plans.management.commands.generate_synthetic_data import PASSWORD
+from plans.models import Event, EventAttendeeRequest
+from users.models import User, Friendship
+from users.telegram import secret_key
+
+
+class Command(BaseCommand):
+    help = (
+        "Request every endpoint of app/urls.py through the test client as the busiest user and write the query "
+        "counts, latencies and allocations to a JSON report, compared against a previous report if given. "
+        "Run generate_synthetic_data first, all writes are rolled back"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help="Timed requests per endpoint")
+        parser.add_argument('--user', help="Email of the user making the requests, the one with the most friends by default")
+        parser.add_argument('--output', help="Path of the JSON report")
+        parser.add_argument('--baseline', help="Path of a previous JSON report to compare with")
+        parser.add_argument('--cached', action='store_true', help="Let repeated requests hit the response cache")
+
+    def handle(self, *args, requests=50, user=None, output=None, baseline=None, cached=False, **options):
+        users = User.objects.filter(email=user) if user else User.objects.order_by('-friends_count')
+        viewer = users.first()
+        if viewer is None:
+            raise CommandError("No user to benchmark as, run generate_synthetic_data first")
+        friend = User.objects.filter(pk__in=Friendship.objects.filter(user=viewer).values('friend')).order_by('-friends_count').first()
+        event = Event.objects.filter(creator=viewer, location_lat__isnull=False).order_by('-attendees_count').first()
+        if friend is None or event is None:
+            raise CommandError(f"{viewer} needs a friend and an event with a location")
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'debug': settings.DEBUG,
+            'requests': requests,
+            'cached': cached,
+            'data': {
+                'users': User.objects.count(),
+                'friendships': Friendship.objects.count() // 2,
+                'events': Event.objects.count(),
+            },
+            'viewer_friends': viewer.friends_count,
+            'endpoints': {},
+        }
+        if settings.DEBUG:
+            self.stderr.write("DEBUG is on, latencies include the debug toolbar and query logging")
+        # Slow request warnings and 4xx logs would bury the table, statuses are reported.
+        logging.disable(logging.WARNING)
+        try:
+            self.run(report, viewer, friend, event, requests, cached)
+        finally:
+            logging.disable(logging.NOTSET)
+
+        self.write_table(report, self.load(baseline) if baseline else None)
+        for name in report['skipped']:
+            self.stderr.write(f"{name}: no benchmark case, skipped")
+        if output:
+            with open(output, 'w') as f:
+                json.dump(report, f, indent=2)
+
+    def run(self, report, viewer, friend, event, requests, cached):
+        with transaction.atomic():
+            self.token = AuthToken.objects.create(user=viewer)[1]
+            cases = self.cases(viewer, friend, event)
+            report['skipped'] = self.uncovered({name for name, *_ in cases})
+            for name, method, path, data, token in cases:
+                report['endpoints'][f'{method.upper()} {name}'] = self.measure(method, path, data, token, requests, cached)
+            transaction.set_rollback(True)
+
+    def cases(self, viewer, friend, event):
+        """
+        `(name, method, path, data, token)` of each request, `data` and
+        `token` being called per request when callable. A dict `token` is sent
+        as the headers instead of a Knox token.
+        """
+        now = timezone.now()
+        new_event = {'title': 'Benchmark', 'location_lat': '55.751244', 'location_long': '37.618423', 'started_at': now.isoformat()}
+        fresh_token = lambda: AuthToken.objects.create(user=viewer)[1]
+        # Users who neither attend nor have asked to attend the event, one asking per request, one asked before.
+        guest, stranger = (User.objects.create_user(f'benchmark-{name}@example.com') for name in ('guest', 'stranger'))
+        pending = EventAttendeeRequest.objects.create(event=event, sender=guest)
+        stranger_token = AuthToken.objects.create(user=stranger)[1]
+        return [
+            ('telegram_login', 'post', reverse('telegram_login'), self.telegram_data, None),
+            ('knox_login', 'post', reverse('knox_login'), {'username': viewer.email, 'password': PASSWORD}, None),
+            ('knox_logout', 'post', reverse('knox_logout'), {}, fresh_token),
+            ('knox_logoutall', 'post', reverse('knox_logoutall'), {}, fresh_token),
+            ('my_detail', 'get', reverse('my_detail'), {}, self.token),
+            ('my_friends', 'get', reverse('my_friends'), {}, self.token),
+            ('my_friends_events', 'get', reverse('my_friends_events'), {}, self.token),
+            ('my_friends_requests', 'get', reverse('my_friends_requests'), {}, self.token),
+            ('my_friend_suggestions', 'get', reverse('my_friend_suggestions'), {}, self.token),
+            ('my_events', 'get', reverse('my_events'), {}, self.token),
+            ('my_events_add', 'post', reverse('my_events_add'), new_event, self.token),
+            ('my_events_batch', 'post', reverse('my_events_batch'), [new_event] * 10, self.token),
+            ('my_calendar', 'get', reverse('my_calendar'), {
+                'start': now.isoformat(), 'end': (now + timedelta(days=30)).isoformat(), 'bucket': 'day',
+            }, self.token),
+            ('search', 'get', reverse('search'), {'q': event.title.split()[0]}, self.token),
+            ('nearby_events', 'get', reverse('nearby_events'), {
+                'lat': str(event.location_lat), 'long': str(event.location_long), 'radius': 5000,
+            }, self.token),
+            ('event_detail', 'get', reverse('event_detail', kwargs={'event_id': event.pk}), {}, self.token),
+            ('event_attendees', 'get', reverse('event_attendees', kwargs={'event_id': event.pk}), {}, self.token),
+            ('event_requests', 'get', reverse('event_requests', kwargs={'event_id': event.pk}), {}, self.token),
+            ('event_requests', 'post', reverse('event_requests', kwargs={'event_id': event.pk}), {'comment': 'Benchmark'}, stranger_token),
+            ('event_request', 'post', reverse('event_request', kwargs={'event_id': event.pk, 'request_id': pending.pk}), {
+                'action': 'accept',
+            }, self.token),
+            ('user_detail', 'get', reverse('user_detail', kwargs={'user_uuid': friend.uuid}), {}, self.token),
+            ('user_detail', 'post', reverse('user_detail', kwargs={'user_uuid': friend.uuid}), {'action': 'remove_from_friends'}, self.token),
+            ('user_mutual_friends', 'get', reverse('user_mutual_friends', kwargs={'user_uuid': friend.uuid}), {}, self.token),
+            ('metrics', 'get', reverse('metrics'), {}, {'Authorization': f'Bearer {settings.METRICS_TOKEN}'}),
+            ('index', 'get', reverse('index'), {}, None),
+        ]
+
+    def uncovered(self, names):
+        patterns = [pattern for pattern in get_resolver().url_patterns if isinstance(pattern, URLPattern)]
+        return sorted({pattern.name for pattern in patterns if pattern.name and pattern.name not in names})
+
+    def telegram_data(self):
+        user = json.dumps({'id': time.time_ns(), 'first_name': 'Benchmark'})
+        fields = {'auth_date': str(int(time.time())), 'query_id': 'benchmark', 'user': user}
+        check_string = '\n'.join(f'{key}={fields[key]}' for key in sorted(fields))
+        fields['hash'] = hmac.new(secret_key(settings.TELEGRAM_BOT_TOKEN), check_string.encode(), hashlib.sha256).hexdigest()
+        return {'user_data': urlencode(fields)}
+
+    def measure(self, method, path, data, token, requests, cached):
+        client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        latencies = []
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        def prepare(i):
+            auth = token() if callable(token) else token
+            if isinstance(auth, dict):
+                headers = auth
+            else:
+                headers = {'Authorization': f'Token {auth}'} if auth else {}
+            body = data() if callable(data) else data
+            if cached:
+                return path, body, headers
+            # A query parameter of its own makes every request miss the response cache.
+            if method == 'get':
+                return path, {**body, 'n': i}, headers
+            return f'{path}?n={i}', body, headers
+
+        def request(path, body, headers):
+            # Each request is rolled back, so writes repeat against the same data.
+            with transaction.atomic():
+                with connection.execute_wrapper(count):
+                    if method == 'get':
+                        response = client.get(path, body, headers=headers)
+                    else:
+                        response = client.post(path, body, content_type='application/json', headers=headers)
+                transaction.set_rollback(True)
+            return response
+
+        request(*prepare(-1))
+        queries = 0
+        for i in range(requests):
+            arguments = prepare(i)
+            started = time.perf_counter()
+            response = request(*arguments)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        per_request = queries / requests
+        arguments = prepare(requests)
+        tracemalloc.start()
+        try:
+            request(*arguments)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'path': path,
+            'status': response.status_code,
+            'queries': per_request,
+            'p50_ms': round(statistics.median(latencies), 3),
+            'p99_ms': round(statistics.quantiles(latencies, n=100)[98] if requests > 1 else latencies[0], 3),
+            'allocated_kib': round(peak / 1024, 1),
+        }
+
+    def load(self, path):
+        with open(path) as f:
+            return json.load(f)
+
+    def write_table(self, report, baseline):
+        self.stdout.write(f"{'endpoint':<30} {'status':>6} {'queries':>8} {'p50 ms':>9} {'p99 ms':>9} {'KiB':>8}")
+        for name, result in report['endpoints'].items():
+            line = (
+                f"{name:<30} {result['status']:>6} {result['queries']:>8.1f} "
+                f"{result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f} {result['allocated_kib']:>8.1f}"
+            )
+            previous = baseline and baseline['endpoints'].get(name)
+            if previous:
+                line += (
+                    f"   queries {result['queries'] - previous['queries']:+.1f}"
+                    f" p50 {self.change(result['p50_ms'], previous['p50_ms'])}"
+                    f" p99 {self.change(result['p99_ms'], previous['p99_ms'])}"
+                )
+            self.stdout.write(line)
+
+    def change(self, value, previous):
+        return f"{(value - previous) / previous:+.0%}" if previous else "n/a"
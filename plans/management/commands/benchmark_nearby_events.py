@@ -0,0 +1,71 @@
+import operator
+import random
+import time
+from decimal import Decimal
+from functools import reduce
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from plans import geo
+from plans.models import Event
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Time nearby event lookups against a full scan on synthetic events, all data is rolled back"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=1000000, help="Largest number of synthetic events")
+        parser.add_argument('--queries', type=int, default=50, help="Lookups timed at each size")
+        parser.add_argument('--radius', type=float, default=5000, help="Lookup radius in meters")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, events=1000000, queries=50, radius=5000, seed=0, **options):
+        rng = random.Random(seed)
+        # Events gather around cities, like real ones do.
+        cities = [(rng.uniform(-55, 70), rng.uniform(-180, 180)) for _ in range(500)]
+        sizes = sorted({min(size, events) for size in (10000, 100000, 1000000, events)})
+
+        with transaction.atomic():
+            creator = User.objects.create(email=f'benchmark-{seed}@example.com')
+            count = 0
+            self.stdout.write(f"{'events':>10} {'geohash ms':>12} {'scan ms':>10} {'matches':>8}")
+            for size in sizes:
+                while count < size:
+                    batch = [self.make_event(creator, rng, cities) for _ in range(min(10000, size - count))]
+                    Event.objects.bulk_create(batch)
+                    count += len(batch)
+
+                points = [self.jitter(rng, rng.choice(cities)) for _ in range(queries)]
+                boxes = [geo.bounding_boxes(lat, long, radius) for lat, long in points]
+                indexed, matches = self.time(boxes, lambda boxes: Event.objects.within_boxes(boxes))
+                scan, _ = self.time(boxes, lambda boxes: Event.objects.filter(reduce(operator.or_, [
+                    Q(location_lat__range=(box[0], box[2]), location_long__range=(box[1], box[3])) for box in boxes
+                ])))
+                self.stdout.write(f"{size:>10} {indexed:>12.2f} {scan:>10.2f} {matches / queries:>8.1f}")
+            transaction.set_rollback(True)
+
+    def make_event(self, creator, rng, cities):
+        lat, long = self.jitter(rng, rng.choice(cities))
+        event = Event(
+            creator=creator,
+            title='Benchmark event',
+            location_lat=Decimal(f'{lat:.6f}'),
+            location_long=Decimal(f'{long:.6f}'),
+        )
+        event.update_geohash()
+        return event
+
+    def jitter(self, rng, city):
+        lat = max(-90.0, min(90.0, rng.gauss(city[0], 0.1)))
+        long = max(-180.0, min(180.0, rng.gauss(city[1], 0.1)))
+        return lat, long
+
+    def time(self, boxes, lookup):
+        matches = 0
+        started = time.perf_counter()
+        for point_boxes in boxes:
+            matches += len(lookup(point_boxes).values_list('pk', flat=True))
+        return (time.perf_counter() - started) * 1000 / len(boxes), matches
@@ -0,0 +1,173 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from plans import recurrence
+from plans.models import Event, EventAttendee, EventAttendeeRequest
+from plans.signals import events_bulk_created
+from users.graph import friendship_graph
+from users.models import User, Friendship, FriendshipRequest
+
+EMAIL_PREFIX = 'synthetic-'
+PASSWORD = 'synthetic'
+
+FIRST_NAMES = ['Anna', 'Boris', 'Chloe', 'Dmitry', 'Elena', 'Felix', 'Greta', 'Hugo', 'Irina', 'Jonas', 'Kate', 'Leo']
+LAST_NAMES = ['Ivanova', 'Smith', 'Novak', 'Garcia', 'Muller', 'Rossi', 'Kowalski', 'Silva', 'Petrov', 'Jensen']
+TITLES = ['Concert', 'Board games', 'Picnic', 'Hiking trip', 'Birthday party', 'Movie night', 'Football', 'Book club']
+CITIES = [
+    ('Moscow', 55.751244, 37.618423),
+    ('Berlin', 52.520008, 13.404954),
+    ('Lisbon', 38.722252, -9.139337),
+    ('Tbilisi', 41.716667, 44.783333),
+    ('Belgrade', 44.787197, 20.457273),
+    ('Buenos Aires', -34.603722, -58.381592),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic users with a power-law friendship graph, events with locations and time ranges, "
+        "attendees and pending requests, for benchmarks"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--friends', type=int, default=5, help="Friendships each new user makes, the graph's mean degree is twice that")
+        parser.add_argument('--events', type=float, default=3, help="Mean events per user")
+        parser.add_argument('--pending-requests', type=float, default=1, help="Mean pending friendship requests per user")
+        parser.add_argument('--attendees', type=float, default=0.3, help="Share of the creator's friends attending an event")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--clear', action='store_true', help="Delete previously generated data first")
+
+    def handle(self, *args, users=1000, friends=5, events=3, pending_requests=1, attendees=0.3, seed=0, clear=False, **options):
+        rng = random.Random(seed)
+        with transaction.atomic():
+            if clear:
+                deleted, _ = User.objects.filter(email__startswith=EMAIL_PREFIX).delete()
+                self.stdout.write(f"{deleted} rows deleted")
+            edges = self.friendship_edges(rng, users, friends)
+            created = self.create_users(rng, users, edges, seed)
+            self.create_friendships(created, edges)
+            self.create_friendship_requests(rng, created, edges, pending_requests)
+            self.create_events(rng, created, edges, events, attendees)
+        friendship_graph.clear()
+        # Bulk inserts skip the receivers indexing users and precomputing suggestions.
+        call_command('rebuild_search_index', stdout=self.stdout)
+        call_command('rebuild_friend_suggestions', stdout=self.stdout)
+
+    def create_users(self, rng, count, edges, seed):
+        # One hash for everyone, hashing a password per user would take most of the run.
+        password = make_password(PASSWORD)
+        users = [
+            User(
+                email=f'{EMAIL_PREFIX}{seed}-{i}@example.com',
+                password=password,
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+            )
+            for i in range(count)
+        ]
+        for a, b in edges:
+            users[a].friends_count += 1
+            users[b].friends_count += 1
+        User.objects.bulk_create(users, batch_size=1000)
+        self.stdout.write(f"{len(users)} users")
+        return users
+
+    def friendship_edges(self, rng, count, degree):
+        """
+        Preferential attachment: every user befriends `degree` earlier users
+        picked in proportion to their friend count, which gives the power-law
+        degree distribution of real social graphs.
+        """
+        edges = set()
+        # Every user appears once per friendship, sampling it is sampling by degree.
+        endpoints = list(range(min(degree, count)))
+        for user in range(len(endpoints), count):
+            targets = set()
+            while len(targets) < min(degree, user):
+                targets.add(rng.choice(endpoints) if rng.random() < 0.9 else rng.randrange(user))
+            for target in targets:
+                edges.add((target, user))
+                endpoints += [target, user]
+        return edges
+
+    def create_friendships(self, users, edges):
+        now = timezone.now()
+        Friendship.objects.bulk_create(
+            [Friendship(user=users[a], friend=users[b]) for edge in edges for a, b in (edge, edge[::-1])],
+            batch_size=1000,
+        )
+        FriendshipRequest.objects.bulk_create(
+            [FriendshipRequest(sender=users[a], receiver=users[b], accepted_at=now) for a, b in edges],
+            batch_size=1000,
+        )
+        self.stdout.write(f"{len(edges)} friendships")
+
+    def create_friendship_requests(self, rng, users, edges, mean):
+        pairs = set()
+        for _ in range(int(len(users) * mean)):
+            a, b = rng.sample(range(len(users)), 2)
+            if (a, b) not in edges and (b, a) not in edges and (b, a) not in pairs:
+                pairs.add((a, b))
+        FriendshipRequest.objects.bulk_create(
+            [FriendshipRequest(sender=users[a], receiver=users[b]) for a, b in pairs],
+            batch_size=1000,
+        )
+        self.stdout.write(f"{len(pairs)} pending friendship requests")
+
+    def create_events(self, rng, users, edges, mean, attendees):
+        friends = [[] for _ in users]
+        for a, b in edges:
+            friends[a].append(b)
+            friends[b].append(a)
+
+        now = timezone.now()
+        events, attending, requesting = [], [], []
+        for i, user in enumerate(users):
+            # Pareto counts: most users create a few events, some create many.
+            for _ in range(int(mean / 2 * rng.paretovariate(2))):
+                event = self.make_event(rng, user, now)
+                going = rng.sample(friends[i], int(len(friends[i]) * attendees * rng.random()))
+                event.attendees_count = len(going)
+                events.append(event)
+                attending.append(going)
+                requesting.append([friend for friend in friends[i] if friend not in going and rng.random() < 0.05])
+
+        events = Event.objects.bulk_create(events, batch_size=1000)
+        events_bulk_created.send(sender=Event, events=events)
+        EventAttendee.objects.bulk_create(
+            [EventAttendee(event=event, user=users[j]) for event, going in zip(events, attending) for j in going],
+            batch_size=1000,
+        )
+        EventAttendeeRequest.objects.bulk_create(
+            [EventAttendeeRequest(event=event, sender=users[j]) for event, senders in zip(events, requesting) for j in senders],
+            batch_size=1000,
+        )
+        self.stdout.write(f"{len(events)} events, {sum(map(len, attending))} attendees")
+
+    def make_event(self, rng, user, now):
+        city, lat, long = rng.choice(CITIES)
+        event = Event(
+            creator=user,
+            title=rng.choice(TITLES),
+            description=f"{rng.choice(TITLES)} with friends",
+            location_text=city,
+            location_lat=Decimal(f'{rng.gauss(lat, 0.05):.6f}'),
+            location_long=Decimal(f'{rng.gauss(long, 0.05):.6f}'),
+        )
+        if rng.random() < 0.9:
+            event.started_at = now + timedelta(hours=rng.randint(-30 * 24, 90 * 24))
+            if rng.random() < 0.7:
+                event.ended_at = event.started_at + timedelta(hours=rng.randint(1, 6))
+            if rng.random() < 0.1:
+                event.recurrence_freq = rng.choice([recurrence.DAILY, recurrence.WEEKLY, recurrence.MONTHLY])
+                event.recurrence_count = rng.randint(2, 20)
+        event.update_computed_fields()
+        return event
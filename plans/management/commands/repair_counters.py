@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from plans.models import Event, EventAttendee
+from users.models import User, Friendship
+
+
+class Command(BaseCommand):
+    help = "Recompute User.friends_count and Event.attendees_count and repair rows that drifted"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report drifted rows")
+
+    def handle(self, *args, dry_run=False, **options):
+        friends = Friendship.objects.filter(user=OuterRef('pk')).order_by().values('user').annotate(count=Count('*')).values('count')
+        attendees = EventAttendee.objects.filter(event=OuterRef('pk')).order_by().values('event').annotate(count=Count('*')).values('count')
+
+        with transaction.atomic():
+            self.repair(User.objects.all(), 'friends_count', Coalesce(Subquery(friends), 0), dry_run)
+            self.repair(Event.objects.all(), 'attendees_count', Coalesce(Subquery(attendees), 0), dry_run)
+
+    def repair(self, queryset, field, actual, dry_run):
+        drifted = queryset.annotate(actual=actual).exclude(**{field: F('actual')})
+        if dry_run:
+            count = drifted.count()
+        else:
+            count = drifted.update(**{field: actual})
+        self.stdout.write(f"{queryset.model.__name__}.{field}: {count} drifted")
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:03
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_attendees(apps, schema_editor):
+    Event = apps.get_model('plans', 'Event')
+    EventAttendee = apps.get_model('plans', 'EventAttendee')
+    attendees = EventAttendee.objects.filter(event=OuterRef('pk')).order_by().values('event').annotate(count=Count('*')).values('count')
+    Event.objects.update(attendees_count=Coalesce(Subquery(attendees), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0002_rename_location_event_location_text_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='attendees_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_attendees, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fan_out_upcoming_events(apps, schema_editor):
+    Event = apps.get_model('plans', 'Event')
+    Friendship = apps.get_model('users', 'Friendship')
+    TimelineEntry = apps.get_model('plans', 'TimelineEntry')
+    events = Event.objects.filter(
+        started_at__gte=timezone.now(),
+        creator__friends_count__lte=settings.TIMELINE_FANOUT_LIMIT,
+    )
+    for event in events.iterator():
+        friend_ids = Friendship.objects.filter(user=event.creator_id).values_list('friend_id', flat=True)
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(user_id=friend_id, event=event, started_at=event.started_at) for friend_id in friend_ids],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0004_event_event_creator_created_idx'),
+        ('users', '0005_friendship_friendship_user_friend_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField()),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='plans.event')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'started_at'], name='timeline_user_started_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'event'), name='timeline_entry_unique')],
+            },
+        ),
+        migrations.RunPython(fan_out_upcoming_events, migrations.RunPython.noop),
+    ]
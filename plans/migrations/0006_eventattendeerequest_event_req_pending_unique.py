@@ -0,0 +1,33 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:05
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def reject_duplicate_pending_requests(apps, schema_editor):
+    EventAttendeeRequest = apps.get_model('plans', 'EventAttendeeRequest')
+    pending = EventAttendeeRequest.objects.filter(accepted_at__isnull=True, rejected_at__isnull=True)
+    seen = set()
+    duplicates = []
+    for pk, *key in pending.order_by('-created_at', '-pk').values_list('pk', 'event', 'sender'):
+        if tuple(key) in seen:
+            duplicates.append(pk)
+        seen.add(tuple(key))
+    EventAttendeeRequest.objects.filter(pk__in=duplicates).update(rejected_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0005_timelineentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(reject_duplicate_pending_requests, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='eventattendeerequest',
+            constraint=models.UniqueConstraint(condition=models.Q(('accepted_at__isnull', True), ('rejected_at__isnull', True)), fields=('event', 'sender'), name='event_req_pending_unique'),
+        ),
+    ]
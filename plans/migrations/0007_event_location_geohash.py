@@ -0,0 +1,31 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:09
+
+from django.db import migrations, models
+
+from plans import geo
+
+
+def compute_geohashes(apps, schema_editor):
+    Event = apps.get_model('plans', 'Event')
+    events = Event.objects.filter(location_lat__isnull=False, location_long__isnull=False)
+    updated = []
+    for event in events.iterator():
+        event.location_geohash = geo.encode(float(event.location_lat), float(event.location_long))
+        updated.append(event)
+    Event.objects.bulk_update(updated, ['location_geohash'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0006_eventattendeerequest_event_req_pending_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='location_geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12),
+        ),
+        migrations.RunPython(compute_geohashes, migrations.RunPython.noop),
+    ]
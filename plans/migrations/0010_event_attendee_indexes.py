@@ -0,0 +1,23 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0009_event_recurrence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='eventattendee',
+            index=models.Index(fields=['event', '-created_at', '-id'], name='event_attendee_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventattendeerequest',
+            index=models.Index(condition=models.Q(('accepted_at__isnull', True), ('rejected_at__isnull', True)), fields=['event', '-created_at', '-id'], name='event_req_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:51
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def delete_duplicate_attendees(apps, schema_editor):
+    Event = apps.get_model('plans', 'Event')
+    EventAttendee = apps.get_model('plans', 'EventAttendee')
+    seen = set()
+    duplicates = []
+    for pk, *key in EventAttendee.objects.order_by('pk').values_list('pk', 'event', 'user'):
+        if tuple(key) in seen:
+            duplicates.append(pk)
+        seen.add(tuple(key))
+    if not duplicates:
+        return
+    events = set(EventAttendee.objects.filter(pk__in=duplicates).values_list('event', flat=True))
+    EventAttendee.objects.filter(pk__in=duplicates).delete()
+    attendees = EventAttendee.objects.filter(event=OuterRef('pk')).order_by().values('event').annotate(count=Count('*')).values('count')
+    Event.objects.filter(pk__in=events).update(attendees_count=Coalesce(Subquery(attendees), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0010_event_attendee_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_attendees, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='eventattendee',
+            constraint=models.UniqueConstraint(fields=('event', 'user'), name='event_attendee_unique'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-18 20:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plans', '0011_event_attendee_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='recurrence_tz',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
@@ -1,8 +1,54 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Q
+from django.utils import timezone
 
+from plans import geo, recurrence
+from plans.signals import attendee_request_answered
 from users.models import User
 
 
+def recurring_after(moment):
+    """
+    Condition on recurring events with occurrences ending after `moment`,
+    however long ago their first occurrence was.
+    """
+    return ~Q(recurrence_freq='') & (Q(recurrence_ends_at__isnull=True) | Q(recurrence_ends_at__gt=moment))
+
+
+class EventQuerySet(models.QuerySet):
+    def within_box(self, min_lat, min_long, max_lat, max_long):
+        """
+        Events located in the box, found through range scans of the geohash
+        index over the few cells covering it.
+        """
+        return self.within_boxes([(min_lat, min_long, max_lat, max_long)])
+
+    def within_boxes(self, boxes):
+        condition = Q()
+        for min_lat, min_long, max_lat, max_long in boxes:
+            cells = Q()
+            for prefix in geo.covering_prefixes(min_lat, min_long, max_lat, max_long):
+                # '{' sorts right after 'z', the last geohash character.
+                cells |= Q(location_geohash__gte=prefix, location_geohash__lt=prefix + '{')
+            condition |= cells & Q(location_lat__range=(min_lat, max_lat), location_long__range=(min_long, max_long))
+        return self.filter(condition)
+
+    def overlapping(self, start, end):
+        """
+        Events overlapping [start, end), events without an end being instants.
+
+        Bounding `ended_at` from below keeps the scan of the (creator, ended_at)
+        index to events that have not finished before the window, past events
+        never get read. Recurring events come from their own partial index,
+        their occurrences are expanded by `plans.recurrence.occurrences`.
+        """
+        return self.filter(
+            Q(ended_at__gt=start, started_at__lt=end)
+            | Q(ended_at__isnull=True, started_at__gte=start, started_at__lt=end)
+            | Q(started_at__lt=end) & recurring_after(start)
+        )
+
+
 class Event(models.Model):
     creator = models.ForeignKey(User, on_delete=models.CASCADE, related_name="created_events")
     title = models.CharField(max_length=200)
@@ -12,17 +58,75 @@ class Event(models.Model):
     location_text = models.CharField(max_length=200, blank=True)
     location_long = models.DecimalField(max_digits=9, decimal_places=6, blank=True, null=True)
     location_lat = models.DecimalField(max_digits=9, decimal_places=6, blank=True, null=True)
+    location_geohash = models.CharField(max_length=geo.PRECISION, blank=True, db_index=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    attendees_count = models.PositiveIntegerField(default=0, editable=False)
+    recurrence_freq = models.CharField(max_length=10, choices=recurrence.FREQUENCIES, blank=True)
+    recurrence_interval = models.PositiveSmallIntegerField(default=1)
+    recurrence_until = models.DateTimeField(null=True, blank=True)
+    recurrence_count = models.PositiveIntegerField(null=True, blank=True)
+    # IANA time zone whose wall clock the series repeats on, TIME_ZONE when blank.
+    recurrence_tz = models.CharField(max_length=64, blank=True)
+    recurrence_ends_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = EventQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['creator', '-created_at', '-id'], name='event_creator_created_idx'),
+            models.Index(fields=['creator', 'started_at'], name='event_creator_started_idx'),
+            models.Index(fields=['creator', 'ended_at'], name='event_creator_ended_idx'),
+            models.Index(fields=['creator', 'started_at'], condition=~Q(recurrence_freq=''), name='event_creator_recurring_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.update_computed_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'location_geohash', 'recurrence_ends_at'}
+        super().save(*args, **kwargs)
+
+    def update_computed_fields(self):
+        self.update_geohash()
+        self.recurrence_ends_at = recurrence.series_end(self)
+
+    def update_geohash(self):
+        if self.location_lat is None or self.location_long is None:
+            self.location_geohash = ''
+        else:
+            self.location_geohash = geo.encode(float(self.location_lat), float(self.location_long))
 
     def action_required_requests(self):
         return self.requests.filter(accepted_at__isnull=True, rejected_at__isnull=True)
 
 
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="timeline_entries")
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="timeline_entries")
+    started_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'event'], name='timeline_entry_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'started_at'], name='timeline_user_started_idx'),
+        ]
+
+
 class EventAttendee(models.Model):
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="attendees")
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="events")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'user'], name='event_attendee_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['event', '-created_at', '-id'], name='event_attendee_created_idx'),
+        ]
+
 
 class EventAttendeeRequest(models.Model):
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="requests")
@@ -31,3 +135,54 @@ class EventAttendeeRequest(models.Model):
     accepted_at = models.DateTimeField(null=True, blank=True)
     rejected_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['event', 'sender'],
+                condition=Q(accepted_at__isnull=True, rejected_at__isnull=True),
+                name='event_req_pending_unique',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['event', '-created_at', '-id'],
+                condition=Q(accepted_at__isnull=True, rejected_at__isnull=True),
+                name='event_req_pending_idx',
+            ),
+        ]
+
+    def check_pending(self):
+        if self.rejected_at:
+            raise ValueError("Request already rejected")
+        if self.accepted_at:
+            raise ValueError("Request already accepted")
+
+    def answer(self, **fields):
+        # The update only matches while the request is pending, so of two
+        # concurrent answers one updates nothing and fails.
+        answered = EventAttendeeRequest.objects.filter(
+            pk=self.pk, accepted_at__isnull=True, rejected_at__isnull=True,
+        ).update(**fields)
+        if not answered:
+            raise ValueError("Request already answered")
+
+    def accept(self):
+        self.check_pending()
+        accepted_at = timezone.now()
+        with transaction.atomic():
+            self.answer(accepted_at=accepted_at)
+            try:
+                EventAttendee.objects.create(event=self.event, user_id=self.sender_id)
+            except IntegrityError:
+                raise ValueError("User is already an attendee")
+            Event.objects.filter(pk=self.event_id).update(attendees_count=F('attendees_count') + 1)
+            self.accepted_at = accepted_at
+            attendee_request_answered.send(sender=EventAttendeeRequest, instance=self)
+
+    def reject(self):
+        self.check_pending()
+        rejected_at = timezone.now()
+        self.answer(rejected_at=rejected_at)
+        self.rejected_at = rejected_at
+        attendee_request_answered.send(sender=EventAttendeeRequest, instance=self)
@@ -0,0 +1,47 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from app import response_cache
+from plans.models import Event, EventAttendee
+from plans.signals import events_bulk_created
+from plans.timeline import fan_out_event, fan_out_events, backfill_friendship, drop_friendship
+from users.signals import friendship_created, friendship_removed
+
+
+@receiver(post_save, sender=Event)
+def event_saved(sender, instance, **kwargs):
+    fan_out_event(instance)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def event_changed(sender, instance, **kwargs):
+    response_cache.bump_on_commit(f'events:{instance.creator_id}')
+
+
+@receiver(events_bulk_created, sender=Event)
+def events_bulk_created_handler(sender, events, **kwargs):
+    fan_out_events(events)
+    response_cache.bump_on_commit(*{f'events:{event.creator_id}' for event in events})
+
+
+@receiver(post_save, sender=EventAttendee)
+@receiver(post_delete, sender=EventAttendee)
+def event_attendee_changed(sender, instance, **kwargs):
+    # Events lists show the attendees count.
+    if EventAttendee.event.is_cached(instance):
+        creator_id = instance.event.creator_id
+    else:
+        creator_id = Event.objects.filter(pk=instance.event_id).values_list('creator_id', flat=True).first()
+    if creator_id is not None:
+        response_cache.bump_on_commit(f'events:{creator_id}')
+
+
+@receiver(friendship_created)
+def friendship_created_handler(sender, user, friend, **kwargs):
+    backfill_friendship(user, friend)
+
+
+@receiver(friendship_removed)
+def friendship_removed_handler(sender, user, friend, **kwargs):
+    drop_friendship(user, friend)
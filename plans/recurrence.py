@@ -0,0 +1,117 @@
+import calendar
+import zoneinfo
+from datetime import timedelta, timezone as dt_timezone
+from functools import lru_cache
+
+from django.conf import settings
+
+DAILY = 'daily'
+WEEKLY = 'weekly'
+MONTHLY = 'monthly'
+FREQUENCIES = [
+    (DAILY, 'Daily'),
+    (WEEKLY, 'Weekly'),
+    (MONTHLY, 'Monthly'),
+]
+
+
+def add_months(value, months):
+    month = value.month - 1 + months
+    year = value.year + month // 12
+    month = month % 12 + 1
+    day = min(value.day, calendar.monthrange(year, month)[1])
+    return value.replace(year=year, month=month, day=day)
+
+
+def nth_start(started_at, freq, interval, n, tz=None):
+    """
+    Start of the `n`th occurrence. Steps are taken on the wall clock of `tz`,
+    so a series keeps its local time of day across DST changes; without a
+    time zone they are plain UTC durations.
+    """
+    if tz is not None:
+        wall = started_at.astimezone(tz).replace(tzinfo=None)
+        return nth_start(wall, freq, interval, n).replace(tzinfo=tz).astimezone(dt_timezone.utc)
+    if freq == MONTHLY:
+        return add_months(started_at, n * interval)
+    return started_at + n * interval * timedelta(days=7 if freq == WEEKLY else 1)
+
+
+def first_index(started_at, freq, interval, moment):
+    """
+    Index of an occurrence starting no later than `moment`, so that walking
+    from it never misses one, without walking from the first occurrence.
+    """
+    if moment <= started_at:
+        return 0
+    if freq == MONTHLY:
+        months = (moment.year - started_at.year) * 12 + moment.month - started_at.month
+        return max(0, months // interval - 1)
+    step = interval * timedelta(days=7 if freq == WEEKLY else 1)
+    # One step earlier, wall clock steps are up to a DST shift off from UTC ones.
+    return max(0, (moment - started_at) // step - 1)
+
+
+def iter_occurrences(started_at, ended_at, freq, interval, until, count, start, end, tz=None):
+    """
+    Yields the `(started_at, ended_at)` of the occurrences overlapping
+    [start, end), an occurrence without an end overlapping when it starts in it.
+    """
+    duration = ended_at - started_at if ended_at else timedelta(0)
+    n = first_index(started_at, freq, interval, start - duration)
+    while count is None or n < count:
+        occurrence_start = nth_start(started_at, freq, interval, n, tz)
+        if occurrence_start >= end or (until is not None and occurrence_start > until):
+            return
+        occurrence_end = occurrence_start + duration
+        if occurrence_end > start or (not ended_at and occurrence_start >= start):
+            yield occurrence_start, occurrence_end if ended_at else None
+        n += 1
+
+
+def get_zone(event):
+    # Series repeat on the wall clock of their time zone, TIME_ZONE by default.
+    return zoneinfo.ZoneInfo(event.recurrence_tz or settings.TIME_ZONE)
+
+
+@lru_cache(maxsize=4096)
+def expand(started_at, ended_at, freq, interval, until, count, start, end, tz=None):
+    # The rule is part of the key, so editing an event never reads a stale window.
+    return tuple(iter_occurrences(started_at, ended_at, freq, interval, until, count, start, end, tz))
+
+
+def occurrences(event, start, end):
+    """
+    Occurrences of an event overlapping [start, end).
+    """
+    if event.started_at is None:
+        return ()
+    if not event.recurrence_freq:
+        return tuple(iter_occurrences(event.started_at, event.ended_at, DAILY, 1, None, 1, start, end))
+    return expand(
+        event.started_at,
+        event.ended_at,
+        event.recurrence_freq,
+        event.recurrence_interval,
+        event.recurrence_until,
+        event.recurrence_count,
+        start,
+        end,
+        get_zone(event),
+    )
+
+
+def series_end(event):
+    """
+    Upper bound of the end of the last occurrence, None for endless series.
+    """
+    if not event.recurrence_freq or event.started_at is None:
+        return None
+    duration = event.ended_at - event.started_at if event.ended_at else timedelta(0)
+    ends = []
+    if event.recurrence_until is not None:
+        ends.append(event.recurrence_until + duration)
+    if event.recurrence_count is not None:
+        last = nth_start(event.started_at, event.recurrence_freq, event.recurrence_interval, event.recurrence_count - 1, get_zone(event))
+        ends.append(last + duration)
+    return min(ends, default=None)
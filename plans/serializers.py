@@ -1,26 +1,18 @@
 import decimal
+import zoneinfo
 
+from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
 from rest_framework import serializers
 
+from app.pagination import CreatedAtCursorPagination
+from plans import recurrence
 from plans.models import Event, EventAttendee, EventAttendeeRequest
+from plans.signals import events_bulk_created
 from users.serializers import UserSerializer
 
 
-class DetailEventSerializer(serializers.ModelSerializer):
-    creator = UserSerializer()
-    attendees = serializers.SerializerMethodField()
-    requests = serializers.SerializerMethodField()
-    class Meta:
-        model = Event
-        fields = ['id', 'creator', 'title', 'created_at', 'description', 'started_at', 'ended_at', 'location']
-
-    def get_attendees(self, event):
-        return EventAttendeeSerializer(event.attendees.all(), many=True).data
-
-    def get_requests(self, event):
-        return EventAttendeeRequestSerializer(event.action_required_requests(), many=True).data
-
-
 class RoundingDecimalField(serializers.DecimalField):
 
     def validate_precision(self, value):
@@ -32,11 +24,22 @@ class RoundingDecimalField(serializers.DecimalField):
         return super().validate_precision(value)
 
 
+class EventListSerializer(serializers.ListSerializer):
+
+    def create(self, validated_data):
+        events = [Event(**attrs) for attrs in validated_data]
+        for event in events:
+            event.update_computed_fields()
+        with transaction.atomic():
+            events = Event.objects.bulk_create(events)
+            events_bulk_created.send(sender=Event, events=events)
+        return events
+
+
 class EventSerializer(serializers.ModelSerializer):
     creator = UserSerializer(required=False)
     started_at = serializers.DateTimeField(required=False, allow_null=True)
     ended_at = serializers.DateTimeField(required=False, allow_null=True)
-    attendees_count = serializers.SerializerMethodField()
     location_lat = RoundingDecimalField(max_digits=9, decimal_places=6)
     location_long = RoundingDecimalField(max_digits=9, decimal_places=6)
     class Meta:
@@ -52,12 +55,19 @@ class EventSerializer(serializers.ModelSerializer):
             'ended_at',
             'location_text',
             'location_lat',
-            'location_long'
+            'location_long',
+            'recurrence_freq',
+            'recurrence_interval',
+            'recurrence_until',
+            'recurrence_count',
+            'recurrence_tz',
         ]
         read_only_fields = ('id', 'creator', 'attendees_count', 'created_at')
-
-    def get_attendees_count(self, event):
-        return event.attendees.count()
+        extra_kwargs = {
+            'recurrence_interval': {'min_value': 1},
+            'recurrence_count': {'min_value': 1},
+        }
+        list_serializer_class = EventListSerializer
 
     def validate_started_at(self, value):
         if not value:
@@ -69,6 +79,137 @@ class EventSerializer(serializers.ModelSerializer):
             return None
         return value
 
+    def validate_recurrence_tz(self, value):
+        if value:
+            try:
+                zoneinfo.ZoneInfo(value)
+            except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+                raise serializers.ValidationError("Unknown time zone")
+        return value
+
+    def validate(self, attrs):
+        if attrs.get('recurrence_freq') and not attrs.get('started_at'):
+            raise serializers.ValidationError({'started_at': "Recurring events need a start"})
+        return attrs
+
+
+class AttendeeSerializer(serializers.ModelSerializer):
+    user = UserSerializer()
+    class Meta:
+        model = EventAttendee
+        fields = ['id', 'user', 'created_at']
+
+
+class AttendeeRequestSerializer(serializers.ModelSerializer):
+    sender = UserSerializer(read_only=True)
+    class Meta:
+        model = EventAttendeeRequest
+        fields = ['id', 'sender', 'comment', 'created_at', 'accepted_at', 'rejected_at']
+        read_only_fields = ('id', 'created_at', 'accepted_at', 'rejected_at')
+
+
+class AttendeeRequestPushSerializer(AttendeeRequestSerializer):
+    # The request as pushed over the updates socket, its event by id.
+    class Meta(AttendeeRequestSerializer.Meta):
+        fields = ['id', 'event', 'sender', 'comment', 'created_at', 'accepted_at', 'rejected_at']
+
+
+class AttendeeRequestActionSerializer(serializers.Serializer):
+    action = serializers.ChoiceField(choices=['accept', 'reject'])
+
+
+class DetailEventSerializer(EventSerializer):
+    """
+    An event with the first page of its attendees and, for its creator, of its
+    pending requests, read from the `first_attendees` and `first_requests`
+    prefetches (see `plans.views.EventView`). The rows do not repeat the event.
+    """
+    attendees = serializers.SerializerMethodField()
+    requests = serializers.SerializerMethodField()
+    class Meta(EventSerializer.Meta):
+        fields = EventSerializer.Meta.fields + ['attendees', 'requests']
+
+    def get_attendees(self, event):
+        return self.first_page(event, event.first_attendees, AttendeeSerializer, 'event_attendees')
+
+    def get_requests(self, event):
+        if not hasattr(event, 'first_requests'):
+            return None
+        return self.first_page(event, event.first_requests, AttendeeRequestSerializer, 'event_requests')
+
+    def first_page(self, event, rows, serializer_class, url_name):
+        paginator = CreatedAtCursorPagination()
+        url = self.context['request'].build_absolute_uri(reverse(url_name, kwargs={'event_id': event.pk}))
+        page = paginator.first_page(rows, url)
+        return paginator.get_paginated_response(serializer_class(page, many=True).data).data
+
+
+class EventOccurrencesSerializer(EventSerializer):
+    """
+    Adds the occurrences of each event inside the `window` of the context.
+    """
+    occurrences = serializers.SerializerMethodField()
+    class Meta(EventSerializer.Meta):
+        fields = EventSerializer.Meta.fields + ['occurrences']
+
+    def get_occurrences(self, event):
+        start, end = self.context['window']
+        field = serializers.DateTimeField()
+        return [
+            {'started_at': field.to_representation(started_at), 'ended_at': ended_at and field.to_representation(ended_at)}
+            for started_at, ended_at in recurrence.occurrences(event, start, end)
+        ]
+
+
+class NearbyEventSerializer(EventSerializer):
+    distance = serializers.SerializerMethodField()
+    class Meta(EventSerializer.Meta):
+        fields = EventSerializer.Meta.fields + ['distance']
+
+    def get_distance(self, event):
+        return round(event.distance)
+
+
+class NearbyEventsQuerySerializer(serializers.Serializer):
+    lat = serializers.FloatField(min_value=-90, max_value=90, required=False)
+    long = serializers.FloatField(min_value=-180, max_value=180, required=False)
+    radius = serializers.FloatField(min_value=1, max_value=50000, default=5000)
+    bbox = serializers.CharField(required=False)
+
+    def validate_bbox(self, value):
+        try:
+            min_lat, min_long, max_lat, max_long = (float(part) for part in value.split(','))
+        except ValueError:
+            raise serializers.ValidationError("Expected min_lat,min_long,max_lat,max_long")
+        if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_long <= max_long <= 180):
+            raise serializers.ValidationError("Invalid bounding box")
+        return min_lat, min_long, max_lat, max_long
+
+    def validate(self, attrs):
+        if 'bbox' not in attrs and ('lat' not in attrs or 'long' not in attrs):
+            raise serializers.ValidationError("Either lat and long or bbox are required")
+        return attrs
+
+
+class CalendarQuerySerializer(serializers.Serializer):
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+    bucket = serializers.ChoiceField(choices=['day'], required=False)
+    tz = serializers.CharField(required=False)
+
+    def validate_tz(self, value):
+        try:
+            return zoneinfo.ZoneInfo(value)
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            raise serializers.ValidationError("Unknown time zone")
+
+    def validate(self, attrs):
+        if attrs['end'] <= attrs['start']:
+            raise serializers.ValidationError("end must be after start")
+        if (attrs['end'] - attrs['start']).days > settings.CALENDAR_MAX_DAYS:
+            raise serializers.ValidationError(f"The window can not be longer than {settings.CALENDAR_MAX_DAYS} days")
+        return attrs
+
 
 class EventAttendeeSerializer(serializers.ModelSerializer):
     user = UserSerializer()
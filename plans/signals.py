@@ -0,0 +1,8 @@
+import django.dispatch
+
+# Sent with `events` after a bulk insert, which does not send post_save.
+events_bulk_created = django.dispatch.Signal()
+
+# Sent with `instance` once a request is accepted or rejected by a conditional
+# update, which does not send post_save.
+attendee_request_answered = django.dispatch.Signal()
@@ -1,3 +1,681 @@
-from django.test import TestCase
+import json
+import zoneinfo
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from app.fast_serializers import ValuesSerializer
+from app.metrics import registry
+from app.pagination import CreatedAtCursorPagination
+from app.renderers import FastJSONRenderer, orjson
+from plans import geo, recurrence
+from plans.models import Event, EventAttendee, EventAttendeeRequest, TimelineEntry
+from plans.serializers import EventSerializer, EventOccurrencesSerializer, EventAttendeeSerializer, EventAttendeeRequestSerializer
+from plans.views import NearbyEventsListView
+from users.models import User, Friendship, FriendshipRequest
+
+
+class UserEventsListViewTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('creator@example.com')
+        self.friend = User.objects.create_user('friend@example.com')
+        FriendshipRequest.objects.create(sender=self.user, receiver=self.friend).accept()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_events(self, count):
+        for i in range(count):
+            event = Event.objects.create(creator=self.user, title=f'Event {i}')
+            EventAttendeeRequest.objects.create(event=event, sender=self.friend).accept()
+
+    def test_query_count_does_not_depend_on_list_size(self):
+        self.create_events(2)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('my_events'))
+        self.assertEqual(len(response.data['results']), 2)
+
+        self.create_events(20)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('my_events'))
+        self.assertEqual(len(response.data['results']), 22)
+
+    def test_cursor_pagination(self):
+        self.create_events(5)
+        response = self.client.get(reverse('my_events'), {'page_size': 2})
+        titles = [event['title'] for event in response.data['results']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            titles += [event['title'] for event in response.data['results']]
+        self.assertEqual(titles, [f'Event {i}' for i in reversed(range(5))])
+
+    def test_counts(self):
+        self.create_events(1)
+        response = self.client.get(reverse('my_events'))
+        self.assertEqual(response.data['results'][0]['attendees_count'], 1)
+        self.assertEqual(response.data['results'][0]['creator']['friends_count'], 1)
+
+    def test_cached_list_is_invalidated(self):
+        self.create_events(1)
+        etag = self.client.get(reverse('my_events'))['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse('my_events'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        stranger = User.objects.create_user('stranger@example.com')
+        EventAttendeeRequest.objects.create(event=Event.objects.get(), sender=stranger).accept()
+        response = self.client.get(reverse('my_events'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['attendees_count'], 2)
+
+        self.create_events(1)
+        self.assertEqual(len(self.client.get(reverse('my_events')).data['results']), 2)
+
+    def test_attendee_changes_read_only_the_creator(self):
+        event = Event.objects.create(creator=self.user, title='Event')
+        with self.assertNumQueries(1):
+            attendee = EventAttendee.objects.create(event=event, user=self.friend)
+        etag = self.client.get(reverse('my_events'))['ETag']
+        attendee = EventAttendee.objects.get(pk=attendee.pk)
+        with self.assertNumQueries(2):
+            attendee.delete()
+        self.assertEqual(self.client.get(reverse('my_events'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class MetricsTestCase(TestCase):
+    def setUp(self):
+        registry.clear()
+        self.user = User.objects.create_user('creator@example.com')
+        Event.objects.create(creator=self.user, title='Event')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_records_queries_per_view(self):
+        self.client.get(reverse('my_events'))
+        with override_settings(DEBUG=True):
+            exposition = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('http_request_db_queries_bucket{view="my_events",method="GET",le="0"} 0', exposition)
+        self.assertIn('http_request_db_queries_count{view="my_events",method="GET"} 1', exposition)
+        self.assertIn('http_responses_total{view="my_events",method="GET",status="200"} 1', exposition)
+
+    @override_settings(METRICS_QUERY_BUDGET=0)
+    def test_logs_requests_over_budget(self):
+        with self.assertLogs('app.metrics', 'WARNING') as logs:
+            self.client.get(reverse('my_events'))
+        self.assertIn('GET /api/user/events/ (my_events)', logs.output[0])
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+    def test_closed_without_token_outside_debug(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+
+class RepairCountersTestCase(TestCase):
+    def test_repairs_drift(self):
+        user = User.objects.create_user('creator@example.com')
+        friend = User.objects.create_user('friend@example.com')
+        Friendship.objects.create(user=user, friend=friend)
+        event = Event.objects.create(creator=user, title='Event')
+        EventAttendee.objects.create(event=event, user=friend)
+
+        call_command('repair_counters', stdout=StringIO())
+
+        user.refresh_from_db()
+        friend.refresh_from_db()
+        event.refresh_from_db()
+        self.assertEqual(user.friends_count, 1)
+        self.assertEqual(friend.friends_count, 0)
+        self.assertEqual(event.attendees_count, 1)
+
+
+class SyntheticDataTestCase(TestCase):
+    def setUp(self):
+        call_command('generate_synthetic_data', users=40, friends=3, events=2, stdout=StringIO())
+
+    def test_counters_match_rows(self):
+        out = StringIO()
+        call_command('repair_counters', dry_run=True, stdout=out)
+        self.assertEqual(out.getvalue(), "User.friends_count: 0 drifted\nEvent.attendees_count: 0 drifted\n")
+        self.assertEqual(Friendship.objects.count(), 2 * (3 * (40 - 3)))
+        self.assertTrue(FriendshipRequest.objects.filter(accepted_at__isnull=True).exists())
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_benchmark_covers_every_endpoint(self):
+        path = Path(self.enterContext(TemporaryDirectory())) / 'report.json'
+        call_command('benchmark_endpoints', requests=2, output=str(path), stdout=StringIO(), stderr=StringIO())
+        report = json.loads(path.read_text())
+        self.assertEqual(report['skipped'], [])
+        for name, result in report['endpoints'].items():
+            self.assertLess(result['status'], 400, name)
+        self.assertEqual(report['endpoints']['GET my_events']['queries'], 2)
+        events = Event.objects.count()
+        call_command('benchmark_endpoints', requests=2, baseline=str(path), stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(Event.objects.count(), events)
+
+
+class UserFriendsEventsListViewTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('user@example.com')
+        self.friend = User.objects.create_user('friend@example.com')
+        self.stranger = User.objects.create_user('stranger@example.com')
+        FriendshipRequest.objects.create(sender=self.user, receiver=self.friend).accept()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_titles(self):
+        response = self.client.get(reverse('my_friends_events'))
+        return [event['title'] for event in response.data['results']]
+
+    def test_feed(self):
+        now = timezone.now()
+        Event.objects.create(creator=self.friend, title='Later', started_at=now + timedelta(days=2))
+        Event.objects.create(creator=self.friend, title='Soon', started_at=now + timedelta(days=1))
+        Event.objects.create(creator=self.friend, title='Past', started_at=now - timedelta(days=1))
+        Event.objects.create(creator=self.friend, title='Undated')
+        Event.objects.create(creator=self.stranger, title='Stranger', started_at=now + timedelta(days=1))
+        self.assertEqual(TimelineEntry.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(self.get_titles(), ['Soon', 'Later'])
+
+    def test_friendship_changes(self):
+        Event.objects.create(creator=self.stranger, title='Stranger', started_at=timezone.now() + timedelta(days=1))
+        FriendshipRequest.objects.create(sender=self.stranger, receiver=self.user).accept()
+        self.assertEqual(self.get_titles(), ['Stranger'])
+        self.user.remove_friend(self.stranger)
+        self.assertEqual(self.get_titles(), [])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_pulls_events_of_creators_without_fan_out(self):
+        self.friend.refresh_from_db()
+        Event.objects.create(creator=self.friend, title='Pulled', started_at=timezone.now() + timedelta(days=1))
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.get_titles(), ['Pulled'])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_creators_crossing_the_fan_out_limit(self):
+        soon = timezone.now() + timedelta(days=1)
+        Event.objects.create(creator=self.friend, title='Fanned out', started_at=soon)
+        FriendshipRequest.objects.create(sender=self.stranger, receiver=self.friend).accept()
+        self.assertFalse(TimelineEntry.objects.exists())
+        # Created by an instance whose friends count was read before the friendship.
+        stale = User.objects.get(pk=self.friend.pk)
+        stale.friends_count = 1
+        Event.objects.create(creator=stale, title='Pulled', started_at=soon + timedelta(hours=1))
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.get_titles(), ['Fanned out', 'Pulled'])
+
+        self.friend.remove_friend(self.stranger)
+        self.assertEqual(TimelineEntry.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(self.get_titles(), ['Fanned out', 'Pulled'])
+
+    def test_running_series(self):
+        started_at = timezone.now() - timedelta(days=10)
+        Event.objects.create(creator=self.friend, title='Weekly', started_at=started_at, recurrence_freq=recurrence.WEEKLY)
+        Event.objects.create(
+            creator=self.friend, title='Over', started_at=started_at, recurrence_freq=recurrence.DAILY, recurrence_count=3,
+        )
+        Event.objects.create(creator=self.stranger, title='Stranger', started_at=started_at, recurrence_freq=recurrence.DAILY)
+        self.assertEqual(self.get_titles(), ['Weekly'])
+
+
+class EventAttendeeRequestConstraintsTestCase(TestCase):
+    def setUp(self):
+        self.creator = User.objects.create_user('creator@example.com')
+        self.sender = User.objects.create_user('sender@example.com')
+        self.event = Event.objects.create(creator=self.creator, title='Event')
+
+    def test_duplicate_pending_request(self):
+        EventAttendeeRequest.objects.create(event=self.event, sender=self.sender)
+        with self.assertRaises(IntegrityError):
+            EventAttendeeRequest.objects.create(event=self.event, sender=self.sender)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Partial index plans are checked on PostgreSQL')
+    def test_pending_lookups_use_indexes(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        # The plain foreign key index would avoid a Seq Scan too, the plans
+        # must name the partial indexes on pending requests.
+        plan = self.event.action_required_requests().order_by('-created_at', '-id').explain()
+        self.assertRegex(plan, 'event_req_pending_(idx|unique)')
+        self.assertIn('event_req_pending_unique', self.event.action_required_requests().filter(sender=self.sender).explain())
+
+
+class EventAttendeeRequestAPITestCase(TestCase):
+    def setUp(self):
+        self.creator = User.objects.create_user('creator@example.com')
+        self.sender = User.objects.create_user('sender@example.com')
+        self.event = Event.objects.create(creator=self.creator, title='Event')
+        self.client = APIClient()
+
+    def send(self, user, comment=''):
+        self.client.force_authenticate(user)
+        return self.client.post(reverse('event_requests', kwargs={'event_id': self.event.pk}), {'comment': comment})
+
+    def answer(self, attendee_request, action):
+        self.client.force_authenticate(self.creator)
+        url = reverse('event_request', kwargs={'event_id': self.event.pk, 'request_id': attendee_request.pk})
+        return self.client.post(url, {'action': action})
+
+    def test_send(self):
+        with self.assertNumQueries(4):
+            response = self.send(self.sender, 'Can I come?')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['sender']['email'], 'sender@example.com')
+        self.assertEqual(response.data['comment'], 'Can I come?')
+        self.assertEqual(self.send(self.sender).status_code, 400)
+        self.assertEqual(self.send(self.creator).status_code, 400)
+        self.assertEqual(EventAttendeeRequest.objects.count(), 1)
+
+    def test_accept(self):
+        attendee_request = EventAttendeeRequest.objects.create(event=self.event, sender=self.sender)
+        response = self.answer(attendee_request, 'accept')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.data['accepted_at'])
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.attendees_count, 1)
+        self.assertTrue(EventAttendee.objects.filter(event=self.event, user=self.sender).exists())
+
+        self.assertEqual(self.answer(attendee_request, 'reject').status_code, 409)
+        self.assertEqual(self.send(self.sender).status_code, 400)
+
+    def test_reject(self):
+        attendee_request = EventAttendeeRequest.objects.create(event=self.event, sender=self.sender)
+        with self.assertNumQueries(2):
+            response = self.answer(attendee_request, 'reject')
+        self.assertIsNotNone(response.data['rejected_at'])
+        self.assertFalse(EventAttendee.objects.exists())
+
+    def test_only_the_creator_answers(self):
+        attendee_request = EventAttendeeRequest.objects.create(event=self.event, sender=self.sender)
+        self.client.force_authenticate(self.sender)
+        url = reverse('event_request', kwargs={'event_id': self.event.pk, 'request_id': attendee_request.pk})
+        self.assertEqual(self.client.post(url, {'action': 'accept'}).status_code, 404)
+
+    def test_stale_request_is_not_accepted_twice(self):
+        attendee_request = EventAttendeeRequest.objects.create(event=self.event, sender=self.sender)
+        stale = EventAttendeeRequest.objects.get(pk=attendee_request.pk)
+        attendee_request.accept()
+        with self.assertRaisesMessage(ValueError, "Request already answered"):
+            stale.accept()
+        self.assertEqual(EventAttendee.objects.count(), 1)
+
+    def test_attendee_is_added_once(self):
+        EventAttendee.objects.create(event=self.event, user=self.sender)
+        attendee_request = EventAttendeeRequest.objects.create(event=self.event, sender=self.sender)
+        with self.assertRaisesMessage(ValueError, "User is already an attendee"):
+            attendee_request.accept()
+        attendee_request.refresh_from_db()
+        self.assertIsNone(attendee_request.accepted_at)
+
+
+class NearbyEventsListViewTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('user@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.create_event('Center', '55.751244', '37.618423')
+        self.create_event('Two km', '55.769200', '37.618423')
+        self.create_event('Far', '55.900000', '37.618423')
+        self.create_event('Nowhere', None, None)
+
+    def create_event(self, title, lat, long):
+        return Event.objects.create(creator=self.user, title=title, location_lat=lat, location_long=long)
+
+    def test_geohash_is_maintained(self):
+        event = Event.objects.get(title='Center')
+        self.assertEqual(event.location_geohash, geo.encode(55.751244, 37.618423))
+        event.location_lat = None
+        event.save(update_fields=['location_lat'])
+        event.refresh_from_db()
+        self.assertEqual(event.location_geohash, '')
+
+    def test_radius(self):
+        response = self.client.get(reverse('nearby_events'), {'lat': 55.751244, 'long': 37.618423, 'radius': 3000})
+        self.assertEqual([event['title'] for event in response.data], ['Center', 'Two km'])
+        self.assertEqual(response.data[1]['distance'], 1997)
+
+    def test_bbox(self):
+        response = self.client.get(reverse('nearby_events'), {'bbox': '55.8,37,56,38'})
+        self.assertEqual([event['title'] for event in response.data], ['Far'])
+
+    def test_nearest_events_are_cut_in_sql(self):
+        with mock.patch.object(NearbyEventsListView, 'limit', 1), self.assertNumQueries(1):
+            response = self.client.get(reverse('nearby_events'), {'lat': 55.769200, 'long': 37.618423, 'radius': 50000})
+        self.assertEqual([event['title'] for event in response.data], ['Two km'])
+
+    def test_antimeridian(self):
+        self.assertEqual(len(geo.bounding_boxes(0, 179.99, 5000)), 2)
+        self.assertEqual(len(geo.bounding_boxes(0, 0, 5000)), 1)
+        self.create_event('East', '-16.5', '179.99')
+        self.create_event('West', '-16.5', '-179.99')
+        response = self.client.get(reverse('nearby_events'), {'lat': -16.5, 'long': 179.995, 'radius': 5000})
+        self.assertEqual({event['title'] for event in response.data}, {'East', 'West'})
+
+    def test_running_series(self):
+        started_at = timezone.now() - timedelta(days=10)
+        Event.objects.filter(title='Center').update(
+            started_at=started_at, ended_at=started_at + timedelta(hours=2), recurrence_freq=recurrence.WEEKLY,
+        )
+        Event.objects.filter(title='Two km').update(started_at=started_at, ended_at=started_at + timedelta(hours=2))
+        response = self.client.get(reverse('nearby_events'), {'lat': 55.751244, 'long': 37.618423, 'radius': 3000})
+        self.assertEqual([event['title'] for event in response.data], ['Center'])
+
+    def test_invalid_query(self):
+        self.assertEqual(self.client.get(reverse('nearby_events'), {'lat': 55}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('nearby_events'), {'bbox': '1,2,3'}).status_code, 400)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_nearby_events', events=200, queries=2, stdout=out)
+        self.assertIn('200', out.getvalue())
+        self.assertFalse(Event.objects.filter(title='Benchmark event').exists())
+
+
+class UserCalendarViewTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('user@example.com')
+        self.friend = User.objects.create_user('friend@example.com')
+        self.stranger = User.objects.create_user('stranger@example.com')
+        FriendshipRequest.objects.create(sender=self.user, receiver=self.friend).accept()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.day = datetime(2025, 3, 1, tzinfo=dt_timezone.utc)
+
+    def create_event(self, creator, title, start_hours, end_hours=None):
+        return Event.objects.create(
+            creator=creator,
+            title=title,
+            started_at=self.day + timedelta(hours=start_hours),
+            ended_at=None if end_hours is None else self.day + timedelta(hours=end_hours),
+        )
+
+    def get(self, **params):
+        params = {'start': self.day.isoformat(), 'end': (self.day + timedelta(days=3)).isoformat(), **params}
+        return self.client.get(reverse('my_calendar'), params)
+
+    def test_overlapping_events(self):
+        self.create_event(self.user, 'Before', -5, -1)
+        self.create_event(self.user, 'Spanning start', -5, 5)
+        self.create_event(self.friend, 'Instant', 10)
+        self.create_event(self.friend, 'Multi day', 20, 48)
+        self.create_event(self.stranger, 'Stranger', 10, 12)
+        self.create_event(self.user, 'After', 72, 80)
+        response = self.get()
+        self.assertEqual([event['title'] for event in response.data['results']], ['Spanning start', 'Instant', 'Multi day'])
+
+    def test_day_buckets(self):
+        self.create_event(self.user, 'Spanning start', -5, 5)
+        self.create_event(self.friend, 'Instant', 10)
+        self.create_event(self.friend, 'Until midnight', 20, 48)
+        response = self.get(bucket='day')
+        self.assertEqual(response.data['days'], [
+            {'date': '2025-03-01', 'count': 3},
+            {'date': '2025-03-02', 'count': 1},
+        ])
+        response = self.get(bucket='day', tz='America/New_York')
+        self.assertEqual(response.data['days'], [
+            {'date': '2025-02-28', 'count': 1},
+            {'date': '2025-03-01', 'count': 2},
+            {'date': '2025-03-02', 'count': 1},
+        ])
+
+    def test_invalid_window(self):
+        self.assertEqual(self.get(end=self.day.isoformat()).status_code, 400)
+        self.assertEqual(self.get(end=(self.day + timedelta(days=100)).isoformat()).status_code, 400)
+        self.assertEqual(self.get(tz='Mars/Olympus').status_code, 400)
+
+    def test_recurring_events(self):
+        weekly = self.create_event(self.friend, 'Weekly', -24 * 7 + 1, -24 * 7 + 2)
+        weekly.recurrence_freq = recurrence.WEEKLY
+        weekly.save()
+        daily = self.create_event(self.user, 'Daily', -24 * 3 + 9, -24 * 3 + 10)
+        daily.recurrence_freq = recurrence.DAILY
+        daily.recurrence_count = 5
+        daily.save()
+        finished = self.create_event(self.user, 'Finished', -24 * 30, -24 * 30 + 1)
+        finished.recurrence_freq = recurrence.DAILY
+        finished.recurrence_until = self.day - timedelta(days=20)
+        finished.save()
+
+        response = self.get()
+        results = {event['title']: event['occurrences'] for event in response.data['results']}
+        self.assertEqual(set(results), {'Weekly', 'Daily'})
+        self.assertEqual(results['Weekly'], [{'started_at': '2025-03-01T01:00:00Z', 'ended_at': '2025-03-01T02:00:00Z'}])
+        self.assertEqual([occurrence['started_at'] for occurrence in results['Daily']], ['2025-03-01T09:00:00Z', '2025-03-02T09:00:00Z'])
+
+        response = self.get(bucket='day', end=(self.day + timedelta(days=8)).isoformat())
+        self.assertEqual(response.data['days'], [
+            {'date': '2025-03-01', 'count': 2},
+            {'date': '2025-03-02', 'count': 1},
+            {'date': '2025-03-08', 'count': 1},
+        ])
+
+
+class RecurrenceTestCase(TestCase):
+    def setUp(self):
+        self.started_at = datetime(2025, 1, 31, 18, tzinfo=dt_timezone.utc)
+        self.window = (datetime(2025, 1, 1, tzinfo=dt_timezone.utc), datetime(2026, 1, 1, tzinfo=dt_timezone.utc))
+
+    def expand(self, freq, interval=1, until=None, count=None, start=None, end=None):
+        return [
+            started_at for started_at, ended_at in recurrence.iter_occurrences(
+                self.started_at, self.started_at + timedelta(hours=2), freq, interval, until, count,
+                start or self.window[0], end or self.window[1],
+            )
+        ]
+
+    def test_monthly_clamps_to_month_end(self):
+        self.assertEqual([started_at.day for started_at in self.expand(recurrence.MONTHLY, count=4)], [31, 28, 31, 30])
+
+    def test_interval_and_until(self):
+        until = self.started_at + timedelta(weeks=6)
+        self.assertEqual(self.expand(recurrence.WEEKLY, interval=2, until=until), [
+            self.started_at, self.started_at + timedelta(weeks=2), self.started_at + timedelta(weeks=4), until,
+        ])
+
+    def test_window_skips_to_first_occurrence(self):
+        start = self.started_at + timedelta(days=1000, hours=1)
+        occurrences = self.expand(recurrence.DAILY, start=start, end=start + timedelta(days=2))
+        self.assertEqual(occurrences, [start - timedelta(hours=1), start + timedelta(hours=23), start + timedelta(hours=47)])
+
+    def test_series_keep_local_time_across_dst(self):
+        # 09:00 in Berlin, the clocks going forward on March 30 2025.
+        started_at = datetime(2025, 3, 20, 8, tzinfo=dt_timezone.utc)
+        event = Event(started_at=started_at, recurrence_freq=recurrence.WEEKLY, recurrence_count=3, recurrence_tz='Europe/Berlin')
+        berlin = zoneinfo.ZoneInfo('Europe/Berlin')
+        occurrences = recurrence.occurrences(event, *self.window)
+        self.assertEqual([started_at.astimezone(berlin).hour for started_at, ended_at in occurrences], [9, 9, 9])
+        self.assertEqual(occurrences[2][0], datetime(2025, 4, 3, 7, tzinfo=dt_timezone.utc))
+        self.assertEqual(recurrence.series_end(event), occurrences[2][0])
+
+        event.recurrence_tz = ''
+        self.assertEqual(recurrence.occurrences(event, *self.window)[2][0], started_at + timedelta(weeks=2))
+
+    def test_series_end(self):
+        event = Event(started_at=self.started_at, recurrence_freq=recurrence.DAILY, recurrence_count=3)
+        self.assertEqual(recurrence.series_end(event), self.started_at + timedelta(days=2))
+        event.recurrence_count = None
+        self.assertIsNone(recurrence.series_end(event))
+
+    def test_expansion_is_cached(self):
+        user = User.objects.create_user('user@example.com')
+        event = Event.objects.create(creator=user, title='Weekly', started_at=self.started_at, recurrence_freq=recurrence.WEEKLY)
+        recurrence.expand.cache_clear()
+        recurrence.occurrences(event, *self.window)
+        recurrence.occurrences(event, *self.window)
+        self.assertEqual(recurrence.expand.cache_info().hits, 1)
+
+    def test_serializer_validation(self):
+        data = {'title': 'Weekly', 'location_lat': '1', 'location_long': '1', 'recurrence_freq': recurrence.WEEKLY}
+        serializer = EventSerializer(data=data)
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('started_at', serializer.errors)
+        serializer = EventSerializer(data={**data, 'started_at': self.started_at, 'recurrence_interval': 0})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('recurrence_interval', serializer.errors)
+        serializer = EventSerializer(data={**data, 'started_at': self.started_at, 'recurrence_tz': 'Mars/Olympus'})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('recurrence_tz', serializer.errors)
+
+
+class EventViewTestCase(TestCase):
+    def setUp(self):
+        self.enterContext(mock.patch.object(CreatedAtCursorPagination, 'page_size', 2))
+        self.creator = User.objects.create_user('creator@example.com')
+        self.viewer = User.objects.create_user('viewer@example.com')
+        self.event = Event.objects.create(creator=self.creator, title='Party', location_lat='55.751244', location_long='37.618423')
+        self.attendees = [User.objects.create_user(f'attendee{i}@example.com') for i in range(5)]
+        for user in self.attendees:
+            EventAttendee.objects.create(event=self.event, user=user)
+        EventAttendeeRequest.objects.create(event=self.event, sender=self.viewer, comment='Can I come?')
+        EventAttendeeRequest.objects.create(event=self.event, sender=self.attendees[0], accepted_at=timezone.now())
+        self.client = APIClient()
+
+    def get(self, user):
+        self.client.force_authenticate(user)
+        return self.client.get(reverse('event_detail', kwargs={'event_id': self.event.pk}))
+
+    def test_detail(self):
+        with self.assertNumQueries(2):
+            response = self.get(self.viewer)
+        self.assertEqual(response.data['title'], 'Party')
+        self.assertEqual(response.data['creator']['email'], 'creator@example.com')
+        self.assertIsNone(response.data['requests'])
+        attendees = response.data['attendees']
+        self.assertEqual([row['user']['email'] for row in attendees['results']], ['attendee4@example.com', 'attendee3@example.com'])
+        self.assertNotIn('event', attendees['results'][0])
+
+        # The next link continues the embedded page on the attendees list.
+        response = self.client.get(attendees['next'])
+        self.assertEqual([row['user']['email'] for row in response.data['results']], ['attendee2@example.com', 'attendee1@example.com'])
+
+    def test_queries_do_not_grow_with_attendees(self):
+        for i in range(20):
+            EventAttendee.objects.create(event=self.event, user=User.objects.create_user(f'more{i}@example.com'))
+        with self.assertNumQueries(3):
+            response = self.get(self.creator)
+        self.assertEqual(len(response.data['attendees']['results']), 2)
+
+    def test_creator_sees_pending_requests(self):
+        requests = self.get(self.creator).data['requests']
+        self.assertEqual([(row['sender']['email'], row['comment']) for row in requests['results']], [('viewer@example.com', 'Can I come?')])
+        self.assertIsNone(requests['next'])
+
+    def test_requests_list_is_for_the_creator(self):
+        url = reverse('event_requests', kwargs={'event_id': self.event.pk})
+        self.client.force_authenticate(self.viewer)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.client.force_authenticate(self.creator)
+        self.assertEqual(len(self.client.get(url).data['results']), 1)
+
+    def test_missing_event(self):
+        self.client.force_authenticate(self.viewer)
+        self.assertEqual(self.client.get(reverse('event_detail', kwargs={'event_id': 0})).status_code, 404)
+        self.assertEqual(self.client.get(reverse('event_attendees', kwargs={'event_id': 0})).status_code, 404)
+
+
+class ValuesSerializerTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('creator@example.com')
+        self.user.first_name = 'Zoë'
+        self.user.save()
+        self.friend = User.objects.create_user('friend@example.com')
+        start = datetime(2025, 3, 1, 18, 30, 15, 123456, tzinfo=dt_timezone.utc)
+        self.event = Event.objects.create(
+            creator=self.user, title='Line\u2028separator «quoted»', started_at=start, ended_at=start + timedelta(hours=2),
+            location_lat='55.751244', location_long='37.618423', recurrence_freq=recurrence.WEEKLY, recurrence_count=3,
+        )
+        Event.objects.create(creator=self.user, title='No dates')
+        EventAttendee.objects.create(event=self.event, user=self.friend)
+        EventAttendeeRequest.objects.create(event=self.event, sender=self.friend, comment='Me too', rejected_at=start)
+
+    def assertSameBytes(self, serializer_class, queryset):
+        values = ValuesSerializer(serializer_class)
+        expected = JSONRenderer().render(serializer_class(queryset, many=True).data)
+        self.assertEqual(FastJSONRenderer().render(values.serialize(values.values(queryset))), expected)
+        self.assertEqual(JSONRenderer().render(values.serialize(values.values(queryset))), expected)
+
+    def test_same_bytes_as_serializers(self):
+        self.assertSameBytes(EventSerializer, Event.objects.order_by('pk'))
+        self.assertSameBytes(EventAttendeeSerializer, EventAttendee.objects.all())
+        self.assertSameBytes(EventAttendeeRequestSerializer, EventAttendeeRequest.objects.all())
+
+    @override_settings(TIME_ZONE='Europe/Moscow')
+    def test_current_time_zone(self):
+        with timezone.override('Asia/Tokyo'):
+            self.assertSameBytes(EventSerializer, Event.objects.order_by('pk'))
+
+    def test_method_fields_are_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            ValuesSerializer(EventOccurrencesSerializer).values(Event.objects.all())
+
+    def test_list_view_pages(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(reverse('my_events'), {'page_size': 1})
+        self.assertEqual(response.data['results'], EventSerializer(Event.objects.filter(title='No dates'), many=True).data)
+        response = client.get(response.data['next'])
+        self.assertEqual(response.data['results'][0]['title'], self.event.title)
+
+    @skipUnless(orjson, "orjson is not installed")
+    def test_renderer_fallbacks(self):
+        data = {'big': 2 ** 70, 'decimal': Decimal('1.5'), 'when': self.event.started_at}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            FastJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2'),
+        )
+
+
+class AddUserEventsBatchViewTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('user@example.com')
+        self.friend = User.objects.create_user('friend@example.com')
+        FriendshipRequest.objects.create(sender=self.user, receiver=self.friend).accept()
+        self.user.refresh_from_db()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def event(self, title, **fields):
+        return {
+            'title': title,
+            'started_at': (timezone.now() + timedelta(days=1)).isoformat(),
+            'location_lat': '55.7512441',
+            'location_long': '37.618423',
+            **fields,
+        }
+
+    def test_creates_events_in_one_round_trip(self):
+        with self.assertNumQueries(9):
+            response = self.client.post(reverse('my_events_batch'), [self.event(f'Event {i}') for i in range(3)], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([event['title'] for event in response.data], ['Event 0', 'Event 1', 'Event 2'])
+        self.assertEqual(response.data[0]['creator']['email'], 'user@example.com')
+        event = Event.objects.get(title='Event 0')
+        self.assertEqual(event.location_geohash, geo.encode(55.751244, 37.618423))
+        self.assertEqual(TimelineEntry.objects.filter(user=self.friend).count(), 3)
+
+    def test_reports_errors_per_item(self):
+        response = self.client.post(reverse('my_events_batch'), [self.event('Valid'), self.event('')], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('title', response.data[1])
+        self.assertFalse(Event.objects.exists())
+
+    def test_batch_size(self):
+        response = self.client.post(reverse('my_events_batch'), [], format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(reverse('my_events_batch'), [self.event('Event')] * 501, format='json')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,118 @@
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from plans.models import Event, TimelineEntry, recurring_after
+from users.models import Friendship, User
+
+
+def friends_counts(*user_ids):
+    # Read from the database, the counts of instances held by callers may be stale.
+    return dict(User.objects.filter(pk__in=user_ids).values_list('pk', 'friends_count'))
+
+
+def fans_out(friends_count):
+    return friends_count <= settings.TIMELINE_FANOUT_LIMIT
+
+
+def fan_out_event(event):
+    """
+    Copies an event into the timeline of every friend of its creator.
+    """
+    if event.started_at is None:
+        TimelineEntry.objects.filter(event=event).delete()
+        return
+    fan_out_events([event])
+
+
+def fan_out_events(events):
+    """
+    Copies dated events into the timelines of their creators' friends, reading
+    the friends of each creator once.
+
+    Creators with more friends than TIMELINE_FANOUT_LIMIT are skipped, their
+    events are pulled by `friends_events` instead.
+    """
+    events = [event for event in events if event.started_at is not None]
+    if not events:
+        return
+    counts = friends_counts(*{event.creator_id for event in events})
+    by_creator = {}
+    for event in events:
+        if fans_out(counts.get(event.creator_id, 0)):
+            by_creator.setdefault(event.creator_id, []).append(event)
+
+    for creator_id, creator_events in by_creator.items():
+        friend_ids = Friendship.objects.filter(user=creator_id).values_list('friend_id', flat=True)
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(user_id=friend_id, event=event, started_at=event.started_at)
+                for friend_id in friend_ids.iterator()
+                for event in creator_events
+            ],
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['user', 'event'],
+            update_fields=['started_at'],
+        )
+
+
+def backfill_friendship(user, friend):
+    """
+    Copies the upcoming events of two new friends into each other's timeline.
+
+    A creator whose new friend takes them over TIMELINE_FANOUT_LIMIT has their
+    entries dropped instead, their events are pulled from now on.
+    """
+    now = timezone.now()
+    counts = friends_counts(user.pk, friend.pk)
+    entries = []
+    for owner, creator in ((user, friend), (friend, user)):
+        count = counts.get(creator.pk, 0)
+        if count == settings.TIMELINE_FANOUT_LIMIT + 1:
+            TimelineEntry.objects.filter(event__creator=creator).delete()
+        if not fans_out(count):
+            continue
+        events = Event.objects.filter(creator=creator, started_at__gte=now).values_list('pk', 'started_at')
+        entries += [TimelineEntry(user=owner, event_id=pk, started_at=started_at) for pk, started_at in events]
+    TimelineEntry.objects.bulk_create(entries, batch_size=1000, ignore_conflicts=True)
+
+
+def drop_friendship(user, friend):
+    """
+    Drops the events of two former friends from each other's timeline.
+
+    A creator whom the removal brings back to TIMELINE_FANOUT_LIMIT has their
+    upcoming events, pulled until now, copied into their friends' timelines.
+    """
+    TimelineEntry.objects.filter(
+        Q(user=user, event__creator=friend) | Q(user=friend, event__creator=user)
+    ).delete()
+    counts = friends_counts(user.pk, friend.pk)
+    crossed = [pk for pk, count in counts.items() if count == settings.TIMELINE_FANOUT_LIMIT]
+    if crossed:
+        fan_out_events(list(Event.objects.filter(creator__in=crossed, started_at__gte=timezone.now())))
+
+
+def friends_events(user):
+    """
+    Upcoming events of the user's friends, and their recurring series that
+    started already but still have occurrences to come.
+
+    Reads the user's timeline with one range scan on (user, started_at) and
+    only adds a pull over `Event` for friends whose events are not fanned out,
+    and for running series through the partial index of recurring events.
+    """
+    now = timezone.now()
+    entries = TimelineEntry.objects.filter(user=user, started_at__gte=now).values('event')
+    pulled = list(
+        Friendship.objects.filter(
+            user=user,
+            friend__friends_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+        ).values_list('friend_id', flat=True)
+    )
+    friends = Friendship.objects.filter(user=user).values('friend')
+    condition = Q(pk__in=entries) | Q(creator__in=friends, started_at__lt=now) & recurring_after(now)
+    if pulled:
+        condition |= Q(creator__in=pulled, started_at__gte=now)
+    return Event.objects.filter(condition)
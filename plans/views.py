@@ -1,22 +1,255 @@
+import math
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, FloatField, OuterRef, Prefetch, Q, prefetch_related_objects
+from django.db.models.functions import Abs, Cast, Least
 from django.http import Http404, HttpResponseRedirect
+from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django.utils import timezone
 from django.views.generic import ListView, DetailView, CreateView, UpdateView
 
-from rest_framework import permissions
-from rest_framework.generics import ListAPIView, CreateAPIView
+from rest_framework import permissions, status
+from rest_framework.generics import GenericAPIView, ListAPIView, CreateAPIView, RetrieveAPIView
+from rest_framework.response import Response
 
 from plans.forms import EventAttendeeRequestActionForm, EventAttendeeRequestCreateForm
-from plans.models import Event, EventAttendeeRequest, EventAttendee
-from plans.serializers import EventSerializer
+from plans.models import Event, EventAttendeeRequest, EventAttendee, recurring_after
+from plans import geo, recurrence
+from plans.serializers import (
+    EventSerializer, EventOccurrencesSerializer, NearbyEventSerializer, NearbyEventsQuerySerializer, CalendarQuerySerializer,
+    DetailEventSerializer, AttendeeSerializer, AttendeeRequestSerializer, AttendeeRequestActionSerializer,
+)
+from plans.timeline import friends_events
+from app.pagination import CreatedAtCursorPagination, StartedAtCursorPagination
+from app.async_views import AsyncListAPIView
+from app.fast_serializers import ValuesSerializer, ValuesListMixin
+from app.response_cache import CachedResponseMixin
+from users.graph import friendship_graph
 
 
-class UserEventsListView(ListAPIView):
+class UserEventsListView(CachedResponseMixin, ValuesListMixin, ListAPIView):
     serializer_class = EventSerializer
+    values_serializer = ValuesSerializer(EventSerializer)
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_cache_scopes(self):
+        return [f'user:{self.request.user.pk}', f'events:{self.request.user.pk}']
+
+    def get_queryset(self):
+        return Event.objects.filter(creator=self.request.user).select_related('creator')
+
+
+class AsyncUserEventsListView(AsyncListAPIView):
+    serializer_class = EventSerializer
+    values_serializer = UserEventsListView.values_serializer
+
+    def get_queryset(self):
+        return Event.objects.filter(creator=self.request.user).select_related('creator')
+
+    async def get_cache_scopes(self):
+        return [f'user:{self.request.user.pk}', f'events:{self.request.user.pk}']
+
+
+class UserFriendsEventsListView(ValuesListMixin, ListAPIView):
+    serializer_class = EventSerializer
+    values_serializer = UserEventsListView.values_serializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = StartedAtCursorPagination
+
+    def get_queryset(self):
+        return friends_events(self.request.user).select_related('creator')
+
+
+class EventView(RetrieveAPIView):
+    """
+    An event with the first page of its attendees and, for its creator, of its
+    pending requests: three queries whatever the number of attendees, the
+    following pages being listed by EventAttendeesListView and
+    EventRequestsListView.
+    """
+    serializer_class = DetailEventSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    lookup_url_kwarg = 'event_id'
+
+    def first_page(self, queryset):
+        # One extra row tells whether there is a next page.
+        pagination = CreatedAtCursorPagination
+        return queryset.order_by(*pagination.ordering)[:pagination.page_size + 1]
+
+    def get_queryset(self):
+        attendees = self.first_page(EventAttendee.objects.select_related('user'))
+        return Event.objects.select_related('creator').prefetch_related(
+            Prefetch('attendees', queryset=attendees, to_attr='first_attendees'),
+        )
+
+    def get_object(self):
+        event = super().get_object()
+        if event.creator_id == self.request.user.pk:
+            requests = self.first_page(EventAttendeeRequest.objects.filter(
+                accepted_at__isnull=True, rejected_at__isnull=True,
+            ).select_related('sender'))
+            prefetch_related_objects([event], Prefetch('requests', queryset=requests, to_attr='first_requests'))
+        return event
+
+
+class EventAttendeesListView(ValuesListMixin, ListAPIView):
+    serializer_class = AttendeeSerializer
+    values_serializer = ValuesSerializer(AttendeeSerializer)
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        event = get_object_or_404(Event.objects.only('pk'), pk=self.kwargs['event_id'])
+        return EventAttendee.objects.filter(event=event)
+
+
+class EventRequestsListView(ValuesListMixin, ListAPIView):
+    serializer_class = AttendeeRequestSerializer
+    values_serializer = ValuesSerializer(AttendeeRequestSerializer)
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        event = get_object_or_404(Event.objects.only('pk'), pk=self.kwargs['event_id'], creator=self.request.user)
+        return event.action_required_requests()
+
+    def post(self, request, *args, **kwargs):
+        """
+        Sends a request to attend the event: one read and one insert, the
+        pending requests constraint refusing a second concurrent request.
+        """
+        is_attendee = EventAttendee.objects.filter(event=OuterRef('pk'), user=request.user)
+        event = get_object_or_404(
+            Event.objects.only('pk', 'creator').annotate(is_attendee=Exists(is_attendee)),
+            pk=self.kwargs['event_id'],
+        )
+        if event.creator_id == request.user.pk:
+            return Response({'message': 'You are the creator of this event'}, status=status.HTTP_400_BAD_REQUEST)
+        if event.is_attendee:
+            return Response({'message': 'You are already an attendee of this event'}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            with transaction.atomic():
+                serializer.save(event=event, sender=request.user)
+        except IntegrityError:
+            return Response({'message': 'You have already sent a request to this event'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class EventRequestView(GenericAPIView):
+    """
+    Accepts or rejects a pending request to the user's event.
+
+    The request is read with its event and sender in one query, then answered
+    by an update conditioned on it still being pending, so of two concurrent
+    answers one fails instead of adding the attendee twice.
+    """
+    serializer_class = AttendeeRequestActionSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        attendee_request = get_object_or_404(
+            EventAttendeeRequest.objects.select_related('event__creator', 'sender'),
+            pk=self.kwargs['request_id'],
+            event=self.kwargs['event_id'],
+            event__creator=request.user,
+        )
+        try:
+            if serializer.validated_data['action'] == 'accept':
+                attendee_request.accept()
+            else:
+                attendee_request.reject()
+        except ValueError as e:
+            return Response({'message': str(e)}, status=status.HTTP_409_CONFLICT)
+        return Response(AttendeeRequestSerializer(attendee_request).data)
+
+
+class NearbyEventsListView(ListAPIView):
+    serializer_class = NearbyEventSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+    limit = 100
+
     def get_queryset(self):
-        return Event.objects.filter(creator=self.request.user)
+        query = NearbyEventsQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        if 'bbox' in params:
+            box = params['bbox']
+            lat, long = (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+            boxes, radius = [box], None
+        else:
+            lat, long, radius = params['lat'], params['long'], params['radius']
+            boxes = geo.bounding_boxes(lat, long, radius)
+
+        # Sorted and cut in SQL by the equirectangular distance, close to the
+        # great-circle one at these radii, so only `limit` rows are loaded
+        # however many events the box holds.
+        lat_offset = Cast('location_lat', FloatField()) - lat
+        long_offset = Abs(Cast('location_long', FloatField()) - long)
+        long_offset = Least(long_offset, 360 - long_offset) * math.cos(math.radians(lat))
+        now = timezone.now()
+        events = Event.objects.within_boxes(boxes).filter(
+            Q(ended_at__isnull=True) | Q(ended_at__gte=now) | recurring_after(now)
+        ).alias(
+            flat_distance=lat_offset * lat_offset + long_offset * long_offset,
+        ).order_by('flat_distance').select_related('creator')[:self.limit]
+        nearby = []
+        for event in events:
+            event.distance = geo.distance(lat, long, float(event.location_lat), float(event.location_long))
+            if radius is None or event.distance <= radius:
+                nearby.append(event)
+        nearby.sort(key=lambda event: event.distance)
+        return nearby
+
+
+class UserCalendarView(ListAPIView):
+    serializer_class = EventOccurrencesSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = StartedAtCursorPagination
+
+    def get_query(self):
+        query = CalendarQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        return query.validated_data
+
+    def get_queryset(self):
+        query = self.get_query()
+        creators = [self.request.user.pk, *friendship_graph.friends_of(self.request.user.pk)]
+        return Event.objects.filter(creator__in=creators).overlapping(query['start'], query['end']).select_related('creator')
+
+    def get_serializer_context(self):
+        query = self.get_query()
+        return {**super().get_serializer_context(), 'window': (query['start'], query['end'])}
+
+    def list(self, request, *args, **kwargs):
+        query = self.get_query()
+        if query.get('bucket') != 'day':
+            return super().list(request, *args, **kwargs)
+
+        tz = query.get('tz') or timezone.get_current_timezone()
+        first_day = timezone.localtime(query['start'], tz).date()
+        last_day = timezone.localtime(query['end'] - timedelta.resolution, tz).date()
+        counts = {}
+        events = self.get_queryset().select_related(None).only(
+            'started_at', 'ended_at', 'recurrence_freq', 'recurrence_interval', 'recurrence_until', 'recurrence_count', 'recurrence_tz',
+        )
+        for event in events:
+            for started_at, ended_at in recurrence.occurrences(event, query['start'], query['end']):
+                day = max(timezone.localtime(started_at, tz).date(), first_day)
+                # An event ending at midnight does not take up the next day.
+                last = min(timezone.localtime(ended_at - timedelta.resolution, tz).date() if ended_at else day, last_day)
+                while day <= last:
+                    counts[day] = counts.get(day, 0) + 1
+                    day += timedelta(days=1)
+        return Response({
+            'days': [{'date': day.isoformat(), 'count': counts[day]} for day in sorted(counts)],
+        })
 
 
 class AddUserEventView(CreateAPIView):
@@ -26,6 +259,18 @@ class AddUserEventView(CreateAPIView):
         serializer.save(creator=self.request.user)
 
 
+class AddUserEventsBatchView(CreateAPIView):
+    serializer_class = EventSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    max_batch_size = 500
+
+    def get_serializer(self, *args, **kwargs):
+        return super().get_serializer(*args, many=True, allow_empty=False, max_length=self.max_batch_size, **kwargs)
+
+    def perform_create(self, serializer):
+        serializer.save(creator=self.request.user)
+
+
 
 class EventDetailView(DetailView):
     model = Event
@@ -75,17 +320,15 @@ class EventAttendeeRequestActionFormView(UpdateView):
         return context
 
     def form_valid(self, form):
-
-        if form.cleaned_data['action'] == 'accept':
-            form.instance.accepted_at = timezone.now()
-            form.instance.save()
-            EventAttendee.objects.create(
-                event=self.event,
-                user=form.instance.sender
-            )
-        elif form.cleaned_data['action'] == 'reject':
-            form.instance.rejected_at = timezone.now()
-            form.instance.save()
+        try:
+            if form.cleaned_data['action'] == 'accept':
+                form.instance.accept()
+            elif form.cleaned_data['action'] == 'reject':
+                form.instance.reject()
+        except ValueError as e:
+            # Answered since the form was loaded, the API views answer 409.
+            form.add_error(None, str(e))
+            return self.form_invalid(form)
 
         return HttpResponseRedirect(self.get_success_url())
 
@@ -110,6 +353,8 @@ class EventAttendeeRequestCreateFormView(CreateView):
             raise Http404("Event does not exist")
         if EventAttendee.objects.filter(event=self.event, user=request.user).exists():
             raise Http404("User is already an attendee")
+        if self.event.action_required_requests().filter(sender=request.user).exists():
+            raise Http404("User has already sent a request")
         return super().dispatch(request, *args, **kwargs)
 
     def get_context_data(self, **kwargs):
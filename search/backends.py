@@ -0,0 +1,127 @@
+import re
+
+from django.db import connection
+
+TOKEN = re.compile(r'[^\W_]+')
+
+
+def tokenize(query):
+    return TOKEN.findall(query.lower())[:8]
+
+
+class PostgresBackend:
+    """
+    Documents live in a tsvector column with a GIN index, the title weighted
+    above the body.
+    """
+
+    def create_schema(self, cursor):
+        cursor.execute(
+            "CREATE TABLE search_document ("
+            " kind varchar(16) NOT NULL,"
+            " object_id varchar(64) NOT NULL,"
+            " document tsvector NOT NULL,"
+            " PRIMARY KEY (kind, object_id))"
+        )
+        cursor.execute("CREATE INDEX search_document_gin ON search_document USING gin (document)")
+
+    def drop_schema(self, cursor):
+        cursor.execute("DROP TABLE IF EXISTS search_document")
+
+    def index(self, cursor, documents):
+        cursor.executemany(
+            "INSERT INTO search_document (kind, object_id, document)"
+            " VALUES (%s, %s, setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'B'))"
+            " ON CONFLICT (kind, object_id) DO UPDATE SET document = EXCLUDED.document",
+            [(kind, str(object_id), title, body) for kind, object_id, title, body in documents],
+        )
+
+    def remove(self, cursor, kind, object_id):
+        cursor.execute("DELETE FROM search_document WHERE kind = %s AND object_id = %s", [kind, str(object_id)])
+
+    def search(self, cursor, kind, tokens, limit):
+        # Every token has to match, the last one as a prefix for typeahead.
+        query = ' & '.join(f"'{token}'" for token in tokens) + ':*'
+        cursor.execute(
+            "SELECT object_id FROM search_document, to_tsquery('simple', %s) query"
+            " WHERE kind = %s AND document @@ query"
+            " ORDER BY ts_rank(document, query) DESC LIMIT %s",
+            [query, kind, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+class SqliteBackend:
+    """
+    Documents live in an FTS5 shadow table, its rowid taken from a key table
+    that maps (kind, object_id) to it.
+    """
+
+    def create_schema(self, cursor):
+        cursor.execute(
+            "CREATE TABLE search_document_key ("
+            " id integer PRIMARY KEY,"
+            " kind varchar(16) NOT NULL,"
+            " object_id varchar(64) NOT NULL,"
+            " UNIQUE (kind, object_id))"
+        )
+        cursor.execute(
+            "CREATE VIRTUAL TABLE search_document USING fts5("
+            "title, body, prefix='2 3 4', tokenize='unicode61 remove_diacritics 2')"
+        )
+
+    def drop_schema(self, cursor):
+        cursor.execute("DROP TABLE IF EXISTS search_document")
+        cursor.execute("DROP TABLE IF EXISTS search_document_key")
+
+    def index(self, cursor, documents):
+        # Three statements whatever the number of documents: the missing keys
+        # inserted, all their ids read back, the documents replaced.
+        keys = [(kind, str(object_id)) for kind, object_id, title, body in documents]
+        values = ', '.join(['(%s, %s)'] * len(keys))
+        params = [param for key in keys for param in key]
+        cursor.execute(f"INSERT OR IGNORE INTO search_document_key (kind, object_id) VALUES {values}", params)
+        cursor.execute(f"SELECT kind, object_id, id FROM search_document_key WHERE (kind, object_id) IN (VALUES {values})", params)
+        rowids = {(kind, object_id): rowid for kind, object_id, rowid in cursor.fetchall()}
+        cursor.executemany(
+            "INSERT OR REPLACE INTO search_document (rowid, title, body) VALUES (%s, %s, %s)",
+            [(rowids[key], title, body) for key, (kind, object_id, title, body) in zip(keys, documents)],
+        )
+
+    def remove(self, cursor, kind, object_id):
+        cursor.execute("SELECT id FROM search_document_key WHERE kind = %s AND object_id = %s", [kind, str(object_id)])
+        row = cursor.fetchone()
+        if row:
+            cursor.execute("DELETE FROM search_document WHERE rowid = %s", [row[0]])
+            cursor.execute("DELETE FROM search_document_key WHERE id = %s", [row[0]])
+
+    def search(self, cursor, kind, tokens, limit):
+        # Every token has to match, the last one as a prefix for typeahead.
+        query = ' '.join(f'"{token}"' for token in tokens) + '*'
+        cursor.execute(
+            "SELECT search_document_key.object_id FROM search_document"
+            " JOIN search_document_key ON search_document_key.id = search_document.rowid"
+            " WHERE search_document MATCH %s AND search_document_key.kind = %s"
+            " ORDER BY bm25(search_document, 10.0, 1.0) LIMIT %s",
+            [query, kind, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+_backends = {}
+
+
+def get_backend(using=connection):
+    """
+    The full-text backend of a database connection, or None when it has none.
+    """
+    if using.alias not in _backends:
+        _backends[using.alias] = None
+        if using.vendor == 'postgresql':
+            _backends[using.alias] = PostgresBackend()
+        elif using.vendor == 'sqlite':
+            with using.cursor() as cursor:
+                cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+                if cursor.fetchone()[0]:
+                    _backends[using.alias] = SqliteBackend()
+    return _backends[using.alias]
@@ -0,0 +1,65 @@
+from itertools import batched
+
+from django.db import connection
+from django.db.models import Q
+
+from search.backends import get_backend, tokenize
+
+EVENT = 'event'
+USER = 'user'
+
+# Documents indexed per statement, their keys within the 999 query
+# parameters older SQLite versions allow.
+BATCH_SIZE = 400
+
+
+def event_document(event):
+    return EVENT, event.pk, event.title, f'{event.description} {event.location_text}'
+
+
+def user_document(user):
+    return USER, user.pk, f'{user.first_name} {user.last_name}', ''
+
+
+def index(documents, using=connection):
+    backend = get_backend(using)
+    if backend is None:
+        return
+    with using.cursor() as cursor:
+        for batch in batched(documents, BATCH_SIZE):
+            backend.index(cursor, batch)
+
+
+def remove(kind, object_id):
+    backend = get_backend()
+    if backend is None:
+        return
+    with connection.cursor() as cursor:
+        backend.remove(cursor, kind, object_id)
+
+
+def search(queryset, kind, query, limit):
+    """
+    The objects of `queryset` matching `query` best first, the last word of the
+    query matching as a prefix.
+
+    Databases without full-text support fall back to substring matching.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    backend = get_backend()
+    if backend is None:
+        condition = Q()
+        for token in tokens:
+            if kind == EVENT:
+                condition &= Q(title__icontains=token) | Q(description__icontains=token) | Q(location_text__icontains=token)
+            else:
+                condition &= Q(first_name__icontains=token) | Q(last_name__icontains=token)
+        return list(queryset.filter(condition)[:limit])
+
+    with connection.cursor() as cursor:
+        object_ids = backend.search(cursor, kind, tokens, limit)
+    pks = [queryset.model._meta.pk.to_python(object_id) for object_id in object_ids]
+    objects = queryset.in_bulk(pks)
+    return [objects[pk] for pk in pks if pk in objects]
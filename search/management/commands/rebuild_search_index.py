@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from plans.models import Event
+from search import index
+from search.backends import get_backend
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index from events and users"
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        if backend is None:
+            self.stdout.write(f"No full-text search on {connection.vendor}, nothing to rebuild")
+            return
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                backend.drop_schema(cursor)
+                backend.create_schema(cursor)
+            index.index(index.event_document(event) for event in Event.objects.iterator())
+            index.index(index.user_document(user) for user in User.objects.iterator())
+        self.stdout.write("Search index rebuilt")
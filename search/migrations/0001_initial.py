@@ -0,0 +1,38 @@
+from django.db import migrations
+
+from search import index
+from search.backends import get_backend
+
+
+def create_search_index(apps, schema_editor):
+    backend = get_backend(schema_editor.connection)
+    if backend is None:
+        return
+    Event = apps.get_model('plans', 'Event')
+    User = apps.get_model('users', 'User')
+    with schema_editor.connection.cursor() as cursor:
+        backend.create_schema(cursor)
+    index.index((index.event_document(event) for event in Event.objects.iterator()), using=schema_editor.connection)
+    index.index((index.user_document(user) for user in User.objects.iterator()), using=schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    backend = get_backend(schema_editor.connection)
+    if backend is None:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        backend.drop_schema(cursor)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('plans', '0008_event_event_creator_started_idx_and_more'),
+        ('users', '0007_friendsuggestion'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,35 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from plans.models import Event
+from plans.signals import events_bulk_created
+from search import index
+from users.models import User
+
+
+@receiver(post_save, sender=Event)
+def event_saved(sender, instance, **kwargs):
+    index.index([index.event_document(instance)])
+
+
+@receiver(events_bulk_created, sender=Event)
+def events_bulk_created_handler(sender, events, **kwargs):
+    index.index(index.event_document(event) for event in events)
+
+
+@receiver(post_delete, sender=Event)
+def event_deleted(sender, instance, **kwargs):
+    index.remove(index.EVENT, instance.pk)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    # Logins save last_login alone, which is not indexed.
+    if update_fields is not None and not {'first_name', 'last_name'} & set(update_fields):
+        return
+    index.index([index.user_document(instance)])
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    index.remove(index.USER, instance.pk)
@@ -0,0 +1,6 @@
+from rest_framework import serializers
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200)
+    type = serializers.ChoiceField(choices=['event', 'user'], required=False)
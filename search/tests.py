@@ -0,0 +1,56 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from plans.models import Event
+from plans.serializers import EventSerializer
+from search import index
+from users.models import User
+
+
+class SearchViewTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('user@example.com')
+        self.user.first_name = 'Tatiana'
+        self.user.last_name = 'Volkova'
+        self.user.save()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        Event.objects.create(creator=self.user, title='Board games night', description='Bring snacks')
+        Event.objects.create(creator=self.user, title='Picnic', description='Board games in the park', location_text='Gorky park')
+        Event.objects.create(creator=self.user, title='Cinema')
+
+    def search(self, q, **params):
+        return self.client.get(reverse('search'), {'q': q, **params}).data
+
+    def test_ranking_and_prefix(self):
+        data = self.search('board gam')
+        self.assertEqual([event['title'] for event in data['events']], ['Board games night', 'Picnic'])
+        self.assertEqual(self.search('gorky')['events'][0]['title'], 'Picnic')
+
+    def test_users(self):
+        data = self.search('tat', type='user')
+        self.assertEqual([user['email'] for user in data['users']], ['user@example.com'])
+        self.assertNotIn('events', data)
+
+    def test_index_follows_writes(self):
+        event = Event.objects.get(title='Cinema')
+        event.title = 'Theatre'
+        event.save()
+        self.assertEqual(self.search('cinema')['events'], [])
+        self.assertEqual(self.search('theat')['events'][0]['title'], 'Theatre')
+        event.delete()
+        self.assertEqual(self.search('theat')['events'], [])
+
+    def test_bulk_created_events_are_indexed(self):
+        serializer = EventSerializer(data=[{'title': 'Karaoke', 'location_lat': '0', 'location_long': '0'}], many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(creator=self.user)
+        self.assertEqual(self.search('karaoke')['events'][0]['title'], 'Karaoke')
+
+    def test_query_without_words(self):
+        self.assertEqual(self.search('!!!')['events'], [])
+        self.assertEqual(self.client.get(reverse('search')).status_code, 400)
+
+    def test_tokenize(self):
+        self.assertEqual(index.tokenize('Hello, world_wide "web"'), ['hello', 'world', 'wide', 'web'])
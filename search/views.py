@@ -0,0 +1,30 @@
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from plans.models import Event
+from plans.serializers import EventSerializer
+from search import index
+from search.serializers import SearchQuerySerializer
+from users.models import User
+from users.serializers import UserSerializer
+
+
+class SearchView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    limit = 10
+
+    def get(self, request, format=None):
+        query = SearchQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        kind = query.validated_data.get('type')
+        q = query.validated_data['q']
+
+        data = {}
+        if kind in (None, index.EVENT):
+            events = index.search(Event.objects.select_related('creator'), index.EVENT, q, self.limit)
+            data['events'] = EventSerializer(events, many=True, context={'request': request}).data
+        if kind in (None, index.USER):
+            users = index.search(User.objects.filter(is_active=True), index.USER, q, self.limit)
+            data['users'] = UserSerializer(users, many=True, context={'request': request}).data
+        return Response(data)
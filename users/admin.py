@@ -5,7 +5,7 @@ from django.contrib.auth.forms import ReadOnlyPasswordHashField
 from django.contrib.auth.models import Group
 from django.core.exceptions import ValidationError
 
-from .models import User, Friendship, FriendshipRequest
+from .models import User, Friendship, FriendshipRequest, FriendSuggestion
 
 
 class UserCreationForm(forms.ModelForm):
@@ -80,3 +80,9 @@ class FriendshipAdmin(admin.ModelAdmin):
 class FriendshipRequestAdmin(admin.ModelAdmin):
     list_display = ('sender', 'receiver', 'accepted_at', 'rejected_at', 'created_at')
     raw_id_fields = ('sender', 'receiver')
+
+
+@admin.register(FriendSuggestion)
+class FriendSuggestionAdmin(admin.ModelAdmin):
+    list_display = ('user', 'suggested', 'mutual_friends_count', 'created_at')
+    raw_id_fields = ('user', 'suggested')
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from django.conf import settings
+        from users import checks, receivers
+        from users.telegram import secret_key
+
+        secret_key(settings.TELEGRAM_BOT_TOKEN)
@@ -0,0 +1,87 @@
+import binascii
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from knox.auth import TokenAuthentication
+from knox.crypto import hash_token
+from knox.models import get_token_model
+from knox.settings import knox_settings
+from rest_framework import exceptions
+from rest_framework.authentication import get_authorization_header
+
+from users.models import User
+
+
+def token_cache_key(digest):
+    return f'knox-token:{digest}'
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Knox token authentication that remembers verified tokens in the
+    KNOX_TOKEN_CACHE cache, keyed by token digest.
+
+    A cache hit costs one hash and a primary key lookup of the user instead of
+    the token scan, the user's token set and the user. Entries are deleted
+    with their AuthToken, see `users.receivers`.
+    """
+
+    def get_digest(self, token):
+        try:
+            return hash_token(token.decode('utf-8'))
+        except (TypeError, UnicodeDecodeError, binascii.Error):
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+    def get_cached_token(self, digest):
+        """
+        The unsaved AuthToken of a cached digest, without its user, or None.
+        """
+        return self.cached_token(digest, caches[settings.KNOX_TOKEN_CACHE].get(token_cache_key(digest)))
+
+    async def aget_cached_token(self, digest):
+        return self.cached_token(digest, await caches[settings.KNOX_TOKEN_CACHE].aget(token_cache_key(digest)))
+
+    def cached_token(self, digest, cached):
+        if cached is None or (knox_settings.AUTO_REFRESH and cached['expiry']):
+            return None
+        if cached['expiry'] is not None and cached['expiry'] <= timezone.now():
+            return None
+        return get_token_model()(digest=digest, user_id=cached['user'], expiry=cached['expiry'])
+
+    def authenticate_credentials(self, token):
+        digest = self.get_digest(token)
+        auth_token = self.get_cached_token(digest)
+        if auth_token is not None:
+            try:
+                auth_token.user = User.objects.get(pk=auth_token.user_id)
+            except User.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+            return self.validate_user(auth_token)
+
+        user, auth_token = super().authenticate_credentials(token)
+        timeout = settings.KNOX_TOKEN_CACHE_TIMEOUT
+        if auth_token.expiry is not None:
+            timeout = min(timeout, (auth_token.expiry - timezone.now()).total_seconds())
+        caches[settings.KNOX_TOKEN_CACHE].set(token_cache_key(digest), {'user': user.pk, 'expiry': auth_token.expiry}, timeout)
+        return user, auth_token
+
+    async def aauthenticate(self, request):
+        """
+        `authenticate` for async views, cache hits load the user with the async
+        ORM and everything else goes through the synchronous path.
+        """
+        auth = get_authorization_header(request).split()
+        if not auth:
+            return None
+        if len(auth) == 2 and auth[0].lower() == self.authenticate_header(request).encode().lower():
+            auth_token = await self.aget_cached_token(self.get_digest(auth[1]))
+            if auth_token is not None:
+                try:
+                    auth_token.user = await User.objects.aget(pk=auth_token.user_id)
+                except User.DoesNotExist:
+                    raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+                return self.validate_user(auth_token)
+        return await sync_to_async(self.authenticate)(request)
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Tags, Warning, register
+
+
+def is_process_local(alias):
+    # Versions kept in such a cache are not seen by other processes, or at all.
+    return isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
+@register(Tags.caches, deploy=True)
+def check_friendship_graph_cache(app_configs, **kwargs):
+    if not is_process_local(settings.FRIENDSHIP_GRAPH_CACHE):
+        return []
+    return [
+        Warning(
+            f"FRIENDSHIP_GRAPH_CACHE '{settings.FRIENDSHIP_GRAPH_CACHE}' is local to the process.",
+            hint="Other processes keep stale friend sets, point it at a shared cache before running several.",
+            id='users.W001',
+        ),
+    ]
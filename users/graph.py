@@ -0,0 +1,104 @@
+import threading
+import uuid
+from collections import Counter, OrderedDict
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from users.models import Friendship
+
+
+def version_key(user_id):
+    return f'friendship-graph:{user_id}'
+
+
+class FriendshipGraph:
+    """
+    Answers friendship questions from per-user adjacency sets kept in a
+    process-local LRU cache.
+
+    Friendship rows are written in both directions, so the adjacency set of a
+    user is the set of `friend_id` of its own rows and one indexed query loads
+    it. Sets are invalidated on `friendship_created`/`friendship_removed`, see
+    `users.receivers`, by bumping a per-user version in the shared
+    FRIENDSHIP_GRAPH_CACHE: every read checks it, so the sets cached by other
+    processes are reloaded too.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._adjacency = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[settings.FRIENDSHIP_GRAPH_CACHE]
+
+    def version(self, user_id):
+        key = version_key(user_id)
+        version = self.cache.get(key)
+        if version is None:
+            self.cache.add(key, uuid.uuid4().hex, None)
+            version = self.cache.get(key)
+        return version
+
+    def friends_of(self, user_id):
+        version = self.version(user_id)
+        with self._lock:
+            if user_id in self._adjacency and self._adjacency[user_id][0] == version:
+                self._adjacency.move_to_end(user_id)
+                return self._adjacency[user_id][1]
+
+        friends = frozenset(Friendship.objects.filter(user=user_id).values_list('friend_id', flat=True))
+
+        with self._lock:
+            # Stored under the version read before loading, an invalidation
+            # meanwhile changes it and the next read loads the set again.
+            self._adjacency[user_id] = (version, friends)
+            self._adjacency.move_to_end(user_id)
+            if len(self._adjacency) > self.maxsize:
+                self._adjacency.popitem(last=False)
+        return friends
+
+    def are_friends(self, user_id, other_id):
+        return other_id in self.friends_of(user_id)
+
+    def mutual_friends(self, user_id, other_id):
+        return self.friends_of(user_id) & self.friends_of(other_id)
+
+    def suggest_friends(self, user_id, limit):
+        """
+        Friends of friends ranked by mutual friend count, as `(user_id, count)`.
+
+        The traversal reads at most FRIEND_SUGGESTIONS_MAX_FRIENDS friends and
+        FRIEND_SUGGESTIONS_MAX_EDGES of their friendships in one query, so its
+        cost is bounded however large the graph or the user's friend list grows.
+        """
+        friends = self.friends_of(user_id)
+        if not friends:
+            return []
+        sampled = list(islice(friends, settings.FRIEND_SUGGESTIONS_MAX_FRIENDS))
+        candidates = Friendship.objects.filter(user__in=sampled).exclude(friend=user_id).values_list('friend_id', flat=True)
+        counts = Counter(candidates[:settings.FRIEND_SUGGESTIONS_MAX_EDGES])
+        for friend_id in friends:
+            counts.pop(friend_id, None)
+        return counts.most_common(limit)
+
+    def invalidate(self, *user_ids):
+        self.cache.set_many({version_key(user_id): uuid.uuid4().hex for user_id in user_ids}, None)
+        with self._lock:
+            for user_id in user_ids:
+                self._adjacency.pop(user_id, None)
+
+    def invalidate_on_commit(self, *user_ids):
+        self.invalidate(*user_ids)
+        transaction.on_commit(lambda: self.invalidate(*user_ids))
+
+    def clear(self):
+        with self._lock:
+            self._adjacency.clear()
+
+
+friendship_graph = FriendshipGraph(settings.FRIENDSHIP_GRAPH_CACHE_SIZE)
@@ -0,0 +1,111 @@
+import asyncio
+import statistics
+import time
+
+from asgiref.sync import ThreadSensitiveContext, iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory
+from django.urls import reverse
+from knox.models import AuthToken
+
+from plans.models import Event
+from plans.views import UserEventsListView, AsyncUserEventsListView
+from users.models import User, FriendshipRequest
+from users.views import (
+    UserView, AsyncUserView, AuthUserView, AsyncAuthUserView, UserFriendsView, AsyncUserFriendsView,
+    UserFriendRequestsView, AsyncUserFriendRequestsView,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare throughput and latency of the sync and async API views under concurrent requests, "
+        "served in process the way the ASGI handler serves them"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help="Requests per endpoint and variant")
+        parser.add_argument('--concurrency', type=int, default=50, help="Requests in flight at once")
+        parser.add_argument('--db-latency', type=float, default=0, help="Milliseconds added to every query, like a remote database")
+        parser.add_argument('--friends', type=int, default=50)
+        parser.add_argument('--events', type=int, default=50)
+        parser.add_argument('--cached', action='store_true', help="Let repeated requests hit the response cache")
+
+    def handle(self, *args, requests=500, concurrency=50, db_latency=0, friends=50, events=50, cached=False, **options):
+        def delay(execute, sql, params, many, context):
+            time.sleep(db_latency / 1000)
+            return execute(sql, params, many, context)
+
+        def add_latency(sender, connection, **kwargs):
+            connection.execute_wrappers.append(delay)
+
+        # Requests run in their own threads and connections, the data has to be committed.
+        viewer, users = self.create_data(friends, events)
+        token = AuthToken.objects.create(user=viewer)[1]
+        if db_latency:
+            connection_created.connect(add_latency)
+        try:
+            endpoints = [
+                ('my_detail', AuthUserView, AsyncAuthUserView, {}),
+                ('my_friends', UserFriendsView, AsyncUserFriendsView, {}),
+                ('my_friends_requests', UserFriendRequestsView, AsyncUserFriendRequestsView, {}),
+                ('my_events', UserEventsListView, AsyncUserEventsListView, {}),
+                ('user_detail', UserView, AsyncUserView, {'user_uuid': users[0].uuid}),
+            ]
+            self.stdout.write(f"{'endpoint':<22} {'variant':<7} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+            for name, sync_view, async_view, kwargs in endpoints:
+                path = reverse(name, kwargs=kwargs)
+                for variant, view_class in [('sync', sync_view), ('async', async_view)]:
+                    view = view_class.as_view()
+                    rate, latencies = asyncio.run(self.run(view, path, kwargs, token, requests, concurrency, cached))
+                    p50 = statistics.median(latencies)
+                    p99 = statistics.quantiles(latencies, n=100)[98]
+                    self.stdout.write(f"{name:<22} {variant:<7} {rate:>8.0f} {p50:>8.2f} {p99:>8.2f}")
+        finally:
+            connection_created.disconnect(add_latency)
+            close_old_connections()
+            User.objects.filter(pk__in=[viewer.pk, *(user.pk for user in users)]).delete()
+
+    def create_data(self, friends, events):
+        stamp = time.time_ns()
+        viewer = User.objects.create_user(f'benchmark-{stamp}@example.com')
+        users = [User.objects.create_user(f'benchmark-{stamp}-{i}@example.com') for i in range(friends + 5)]
+        for user in users[:friends]:
+            FriendshipRequest.objects.create(sender=viewer, receiver=user).accept()
+        for user in users[friends:]:
+            FriendshipRequest.objects.create(sender=user, receiver=viewer)
+        for i in range(events):
+            Event.objects.create(creator=viewer, title=f'Benchmark event {i}')
+        return viewer, users
+
+    async def run(self, view, path, kwargs, token, requests, concurrency, cached):
+        factory = RequestFactory(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        latencies = []
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def request(i):
+            async with semaphore:
+                # A query parameter of its own makes every request miss the response cache.
+                http_request = factory.get(path, {} if cached else {'n': i}, HTTP_AUTHORIZATION=f'Token {token}')
+                started = time.perf_counter()
+                # One context per request gives each its own database thread, as under the ASGI handler.
+                async with ThreadSensitiveContext():
+                    if iscoroutinefunction(view):
+                        response = await view(http_request, **kwargs)
+                        await sync_to_async(close_old_connections)()
+                    else:
+                        response = await sync_to_async(self.call_sync, thread_sensitive=True)(view, http_request, kwargs)
+                latencies.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 200, response.content
+
+        started = time.perf_counter()
+        await asyncio.gather(*(request(i) for i in range(requests)))
+        return requests / (time.perf_counter() - started), latencies
+
+    def call_sync(self, view, request, kwargs):
+        response = view(request, **kwargs).render()
+        close_old_connections()
+        return response
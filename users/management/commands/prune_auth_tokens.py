@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.utils import timezone
+from knox.models import get_token_model
+
+
+class Command(BaseCommand):
+    help = "Delete expired and stale Knox tokens"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age', type=int, help="Delete tokens created more than this many days ago")
+        parser.add_argument('--keep', type=int, help="Keep only this many most recent tokens per user")
+
+    def handle(self, *args, max_age=None, keep=None, **options):
+        AuthToken = get_token_model()
+        now = timezone.now()
+
+        deleted, _ = AuthToken.objects.filter(expiry__lt=now).delete()
+        self.stdout.write(f"{deleted} expired tokens deleted")
+
+        if max_age is not None:
+            deleted, _ = AuthToken.objects.filter(created__lt=now - timedelta(days=max_age)).delete()
+            self.stdout.write(f"{deleted} tokens older than {max_age} days deleted")
+
+        if keep is not None:
+            deleted = 0
+            users = AuthToken.objects.values('user').annotate(count=Count('*')).filter(count__gt=keep).values_list('user', flat=True)
+            for user in users:
+                kept = AuthToken.objects.filter(user=user).order_by('-created').values_list('digest', flat=True)[:keep]
+                deleted += AuthToken.objects.filter(user=user).exclude(digest__in=list(kept)).delete()[0]
+            self.stdout.write(f"{deleted} tokens over the per-user limit deleted")
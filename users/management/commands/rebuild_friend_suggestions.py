@@ -0,0 +1,32 @@
+from itertools import batched
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from users.graph import friendship_graph
+from users.models import User, FriendSuggestion
+
+
+class Command(BaseCommand):
+    help = "Rebuild the precomputed friend suggestions table, meant to be run periodically"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help="Suggestions kept per user")
+        parser.add_argument('--batch-size', type=int, default=500, help="Users replaced per transaction")
+
+    def handle(self, *args, limit=20, batch_size=500, **options):
+        FriendSuggestion.objects.filter(user__friends_count=0).delete()
+
+        user_ids = User.objects.filter(friends_count__gt=0).values_list('pk', flat=True)
+        total = 0
+        for batch in batched(user_ids.iterator(), batch_size):
+            suggestions = [
+                FriendSuggestion(user_id=user_id, suggested_id=suggested_id, mutual_friends_count=count)
+                for user_id in batch
+                for suggested_id, count in friendship_graph.suggest_friends(user_id, limit)
+            ]
+            with transaction.atomic():
+                FriendSuggestion.objects.filter(user__in=batch).delete()
+                FriendSuggestion.objects.bulk_create(suggestions)
+            total += len(suggestions)
+        self.stdout.write(f"{total} suggestions rebuilt")
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:03
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_friends(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Friendship = apps.get_model('users', 'Friendship')
+    friends = Friendship.objects.filter(user=OuterRef('pk')).order_by().values('user').annotate(count=Count('*')).values('count')
+    User.objects.update(friends_count=Coalesce(Subquery(friends), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_is_email_faked_user_telegram_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='friends_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_friends, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_friends_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='friendship',
+            index=models.Index(fields=['user', 'friend'], name='friendship_user_friend_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='friendshiprequest',
+            index=models.Index(fields=['sender', '-created_at', '-id'], name='friendship_req_sender_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='friendshiprequest',
+            index=models.Index(fields=['receiver', '-created_at', '-id'], name='friendship_req_receiver_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-created_at', '-uuid'], name='user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:05
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def reject_duplicate_pending_requests(apps, schema_editor):
+    FriendshipRequest = apps.get_model('users', 'FriendshipRequest')
+    pending = FriendshipRequest.objects.filter(accepted_at__isnull=True, rejected_at__isnull=True)
+    seen = set()
+    duplicates = []
+    for pk, *key in pending.order_by('-created_at', '-pk').values_list('pk', 'sender', 'receiver'):
+        if tuple(key) in seen:
+            duplicates.append(pk)
+        seen.add(tuple(key))
+    FriendshipRequest.objects.filter(pk__in=duplicates).update(rejected_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_friendship_friendship_user_friend_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(reject_duplicate_pending_requests, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='friendshiprequest',
+            index=models.Index(condition=models.Q(('accepted_at__isnull', True), ('rejected_at__isnull', True)), fields=['receiver'], name='friendship_req_pending_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='friendshiprequest',
+            constraint=models.UniqueConstraint(condition=models.Q(('accepted_at__isnull', True), ('rejected_at__isnull', True)), fields=('sender', 'receiver'), name='friendship_req_pending_unique'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:54
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def delete_duplicate_friendships(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Friendship = apps.get_model('users', 'Friendship')
+    seen = set()
+    duplicates = []
+    for pk, *key in Friendship.objects.order_by('pk').values_list('pk', 'user', 'friend'):
+        if tuple(key) in seen:
+            duplicates.append(pk)
+        seen.add(tuple(key))
+    if not duplicates:
+        return
+    users = set(Friendship.objects.filter(pk__in=duplicates).values_list('user', flat=True))
+    Friendship.objects.filter(pk__in=duplicates).delete()
+    friendships = Friendship.objects.filter(user=OuterRef('pk')).order_by().values('user').annotate(count=Count('*')).values('count')
+    User.objects.filter(pk__in=users).update(friends_count=Coalesce(Subquery(friendships), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_friendsuggestion'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_friendships, migrations.RunPython.noop),
+        # The constraint's unique index serves the (user, friend) lookups the index did.
+        migrations.AddConstraint(
+            model_name='friendship',
+            constraint=models.UniqueConstraint(fields=('user', 'friend'), name='friendship_unique'),
+        ),
+        migrations.RemoveIndex(
+            model_name='friendship',
+            name='friendship_user_friend_idx',
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.3 on 2026-10-18 20:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_friendship_unique'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='friendship',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='friendship_user_created_idx'),
+        ),
+    ]
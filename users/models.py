@@ -2,11 +2,15 @@ from uuid import uuid4
 
 from django.contrib.auth.base_user import BaseUserManager, AbstractBaseUser
 from django.contrib.auth.models import AbstractUser
-from django.db import models
-from django.db.models import Q
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, Exists, F, Q, When
+from django.db.models.functions import Cast
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from users.signals import friendship_created, friendship_removed, friendship_request_answered, friendship_request_cancelled
+
+
 class MyUserManager(BaseUserManager):
     def create_user(self, email, password=None):
         if not email:
@@ -45,9 +49,15 @@ class User(AbstractBaseUser):
     is_admin = models.BooleanField(default=False)
     is_email_faked = models.BooleanField(default=False)
     friends = models.ManyToManyField("self", through="Friendship", symmetrical=False)
+    friends_count = models.PositiveIntegerField(default=0, editable=False)
 
     objects = MyUserManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-uuid'], name='user_created_idx'),
+        ]
+
     USERNAME_FIELD = "email"
 
     def __str__(self):
@@ -76,6 +86,24 @@ class User(AbstractBaseUser):
     def friendship_with(self, user):
         return Friendship.objects.filter(user=self, friend=user).first()
 
+    def remove_friend(self, user):
+        friendships = Friendship.objects.filter(Q(user=self, friend=user) | Q(user=user, friend=self))
+        with transaction.atomic():
+            # Each counter drops by the row of its own side, both in one update.
+            User.objects.filter(pk__in=[self.pk, user.pk]).update(friends_count=F('friends_count') - Case(
+                *(When(pk=owner.pk, then=Cast(Exists(friendships.filter(user=owner)), models.IntegerField())) for owner in (self, user)),
+            ))
+            # Raw, so the rows are not read back to send post_delete one by one,
+            # friendship_removed stands for the pair.
+            deleted = friendships._raw_delete(friendships.db)
+            if deleted == 2:
+                self.friends_count -= 1
+                user.friends_count -= 1
+            elif deleted:
+                self.refresh_from_db(fields=['friends_count'])
+                user.refresh_from_db(fields=['friends_count'])
+            friendship_removed.send(sender=User, user=self, friend=user)
+
     def friendship_requests(self):
         return FriendshipRequest.objects.filter(Q(sender=self) | Q(receiver=self)).filter(accepted_at__isnull=True, rejected_at__isnull=True).all()
 
@@ -91,6 +119,14 @@ class Friendship(models.Model):
     friend = models.ForeignKey(User, verbose_name=_("friend"), on_delete=models.CASCADE, related_name="+")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'friend'], name='friendship_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='friendship_user_created_idx'),
+        ]
+
 
 class FriendshipRequest(models.Model):
     # uuid = models.UUIDField(primary_key=True, default=uuid4, editable=False)
@@ -101,24 +137,91 @@ class FriendshipRequest(models.Model):
     rejected_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['sender', 'receiver'],
+                condition=Q(accepted_at__isnull=True, rejected_at__isnull=True),
+                name='friendship_req_pending_unique',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['sender', '-created_at', '-id'], name='friendship_req_sender_idx'),
+            models.Index(fields=['receiver', '-created_at', '-id'], name='friendship_req_receiver_idx'),
+            models.Index(
+                fields=['receiver'],
+                condition=Q(accepted_at__isnull=True, rejected_at__isnull=True),
+                name='friendship_req_pending_idx',
+            ),
+        ]
+
     @property
     def is_pending(self):
         return self.accepted_at is None and self.rejected_at is None
 
-    def accept(self):
+    def check_pending(self):
         if self.rejected_at:
             raise ValueError("Request already rejected")
         if self.accepted_at:
             raise ValueError("Request already accepted")
-        self.accepted_at = timezone.now()
-        self.save()
-        Friendship.objects.create(user=self.sender, friend=self.receiver)
-        Friendship.objects.create(user=self.receiver, friend=self.sender)
+
+    def pending(self):
+        return FriendshipRequest.objects.filter(pk=self.pk, accepted_at__isnull=True, rejected_at__isnull=True)
+
+    def answer(self, **fields):
+        # The update only matches while the request is pending, so of two
+        # concurrent answers one updates nothing and fails.
+        if not self.pending().update(**fields):
+            raise ValueError("Request already answered")
+
+    def accept(self):
+        """
+        Accepts the request and returns the two Friendship rows of the pair,
+        the sender's first.
+        """
+        self.check_pending()
+        accepted_at = timezone.now()
+        friendships = [Friendship(user=self.sender, friend=self.receiver), Friendship(user=self.receiver, friend=self.sender)]
+        with transaction.atomic():
+            self.answer(accepted_at=accepted_at)
+            try:
+                Friendship.objects.bulk_create(friendships)
+            except IntegrityError:
+                raise ValueError("Users are already friends")
+            User.objects.filter(pk__in=[self.sender_id, self.receiver_id]).update(friends_count=F('friends_count') + 1)
+            self.accepted_at = accepted_at
+            self.sender.friends_count += 1
+            self.receiver.friends_count += 1
+            friendship_request_answered.send(sender=FriendshipRequest, instance=self)
+            friendship_created.send(sender=User, user=self.sender, friend=self.receiver)
+        return friendships
 
     def reject(self):
-        if self.rejected_at:
-            raise ValueError("Request already rejected")
-        if self.accepted_at:
-            raise ValueError("Request already accepted")
-        self.rejected_at = timezone.now()
-        self.save()
+        self.check_pending()
+        rejected_at = timezone.now()
+        self.answer(rejected_at=rejected_at)
+        self.rejected_at = rejected_at
+        friendship_request_answered.send(sender=FriendshipRequest, instance=self)
+
+    def cancel(self):
+        with transaction.atomic():
+            # Locked, so the request can not be accepted between the check and the delete.
+            if not self.pending().select_for_update().exists():
+                raise ValueError("Request already answered")
+            self.delete()
+            friendship_request_cancelled.send(sender=FriendshipRequest, instance=self)
+
+
+class FriendSuggestion(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="friend_suggestions")
+    suggested = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    mutual_friends_count = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'suggested'], name='friend_suggestion_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-mutual_friends_count'], name='friend_suggestion_rank_idx'),
+        ]
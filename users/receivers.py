@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from knox.models import get_token_model
+
+from app import response_cache
+from users.authentication import token_cache_key
+from users.graph import friendship_graph
+from users.models import User, Friendship, FriendshipRequest
+from users.signals import friendship_created, friendship_removed, friendship_request_answered
+from users.views import user_pk_cache_key
+
+
+@receiver(friendship_created)
+@receiver(friendship_removed)
+def invalidate_friendship_graph(sender, user, friend, **kwargs):
+    friendship_graph.invalidate_on_commit(user.pk, friend.pk)
+
+
+@receiver(post_delete, sender=get_token_model())
+def forget_auth_token(sender, instance, **kwargs):
+    caches[settings.KNOX_TOKEN_CACHE].delete(token_cache_key(instance.digest))
+
+
+def friends_list_scopes(user):
+    # Friends lists show the profile of each friend. The lists of a user's
+    # friends are bumped up to RESPONSE_CACHE_FANOUT_LIMIT friends, read from
+    # the database as the graph of this process may not know of every
+    # friendship yet.
+    if user.friends_count > settings.RESPONSE_CACHE_FANOUT_LIMIT:
+        return []
+    friends = Friendship.objects.filter(user=user.pk).values_list('friend_id', flat=True)
+    return [f'friends:{friend}' for friend in friends]
+
+
+def friendship_scopes(user_id, friend_id):
+    return [f'user:{user_id}', f'user:{friend_id}', f'friends:{user_id}', f'friends:{friend_id}']
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created=False, update_fields=None, **kwargs):
+    if created:
+        caches[settings.RESPONSE_CACHE].set(user_pk_cache_key(instance.uuid), instance.pk, None)
+        return
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    response_cache.bump_on_commit(f'user:{instance.pk}', *friends_list_scopes(instance))
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    # Friends lists drop the user along with their Friendship rows.
+    response_cache.bump_on_commit(f'user:{instance.pk}')
+
+
+@receiver(post_save, sender=Friendship)
+@receiver(post_delete, sender=Friendship)
+def friendship_changed(sender, instance, **kwargs):
+    response_cache.bump_on_commit(*friendship_scopes(instance.user_id, instance.friend_id))
+
+
+@receiver(friendship_created)
+@receiver(friendship_removed)
+def friendship_pair_changed(sender, user, friend, **kwargs):
+    # The pair is bulk created and raw deleted, which sends no post_save or
+    # post_delete.
+    response_cache.bump_on_commit(*friendship_scopes(user.pk, friend.pk))
+
+
+@receiver(post_save, sender=FriendshipRequest)
+@receiver(post_delete, sender=FriendshipRequest)
+@receiver(friendship_request_answered, sender=FriendshipRequest)
+def friendship_request_changed(sender, instance, **kwargs):
+    response_cache.bump_on_commit(f'user:{instance.sender_id}', f'user:{instance.receiver_id}')
@@ -0,0 +1,75 @@
+from dataclasses import dataclass
+
+from django.db.models import Q
+
+from users.models import Friendship, FriendshipRequest
+
+
+@dataclass
+class Relationship:
+    friendship: Friendship | None = None
+    request_from: FriendshipRequest | None = None
+    request_to: FriendshipRequest | None = None
+
+
+class RelationshipResolver:
+    """
+    Loads the friendship and pending friendship request state between a viewer
+    and a set of users with one query per kind, instead of three per user.
+
+    Call `resolve` (or `aresolve` from async code) with every user of a page
+    before rendering it, `get` then answers from memory; users that were not
+    resolved are loaded one by one.
+    """
+
+    def __init__(self, viewer):
+        self.viewer = viewer
+        self._relationships = {}
+
+    def resolve(self, users):
+        pks = self.pending(users)
+        if pks:
+            self.store(pks, list(self.requests(pks)), list(self.friendships(pks)))
+
+    async def aresolve(self, users):
+        pks = self.pending(users)
+        if pks:
+            requests = [friendship_request async for friendship_request in self.requests(pks)]
+            friendships = [friendship async for friendship in self.friendships(pks)]
+            self.store(pks, requests, friendships)
+
+    def pending(self, users):
+        return {user.pk for user in users} - self._relationships.keys() - {self.viewer.pk}
+
+    def requests(self, pks):
+        return FriendshipRequest.objects.filter(
+            Q(sender=self.viewer, receiver__in=pks) | Q(sender__in=pks, receiver=self.viewer),
+            accepted_at__isnull=True,
+            rejected_at__isnull=True,
+        ).select_related('sender', 'receiver').order_by('pk')
+
+    def friendships(self, pks):
+        return Friendship.objects.filter(
+            user__in=pks,
+            friend=self.viewer,
+        ).select_related('user', 'friend').order_by('pk')
+
+    def store(self, pks, requests, friendships):
+        relationships = {pk: Relationship() for pk in pks}
+        for friendship_request in requests:
+            if friendship_request.sender_id == self.viewer.pk:
+                relationship = relationships[friendship_request.receiver_id]
+                relationship.request_to = relationship.request_to or friendship_request
+            else:
+                relationship = relationships[friendship_request.sender_id]
+                relationship.request_from = relationship.request_from or friendship_request
+        for friendship in friendships:
+            relationship = relationships[friendship.user_id]
+            relationship.friendship = relationship.friendship or friendship
+        self._relationships.update(relationships)
+
+    def get(self, user):
+        if user.pk == self.viewer.pk:
+            return None
+        self.resolve([user])
+        return self._relationships[user.pk]
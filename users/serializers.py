@@ -1,25 +1,20 @@
 from rest_framework import serializers
 
-from users.models import User, FriendshipRequest, Friendship
+from users.models import User, FriendshipRequest, Friendship, FriendSuggestion
+from users.relationships import RelationshipResolver
 
 
 class UserSerializer(serializers.ModelSerializer):
-    friends_count = serializers.SerializerMethodField()
     class Meta:
         model = User
         fields = ['uuid', 'email', 'first_name', 'last_name', 'friends_count', 'created_at']
         read_only_fields = ('uuid', 'friends_count', 'created_at')
 
-
-    def get_friends_count(self, user):
-        return user.friends.count()
-
 class DetailUserSerializer(serializers.ModelSerializer):
     can_be_added_as_a_friend = serializers.SerializerMethodField()
     friendship_request_from = serializers.SerializerMethodField()
     friendship_request_to = serializers.SerializerMethodField()
     friendship = serializers.SerializerMethodField()
-    friends_count = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -42,38 +37,31 @@ class DetailUserSerializer(serializers.ModelSerializer):
             return False
         return self.context['request'].user.uuid != user.uuid
 
-    def get_friendship_request_from(self, user):
-        if not self.context['request'].user.is_authenticated:
-            return None
-        if self.context['request'].user.uuid == user.uuid:
+    def get_relationship(self, user):
+        viewer = self.context['request'].user
+        if not viewer.is_authenticated:
             return None
-        friendship_request = user.friendship_request_to(self.context['request'].user)
-        if not friendship_request:
+        if 'relationships' not in self.context:
+            self.context['relationships'] = RelationshipResolver(viewer)
+        return self.context['relationships'].get(user)
+
+    def get_friendship_request_from(self, user):
+        relationship = self.get_relationship(user)
+        if not relationship or not relationship.request_from:
             return None
-        return FriendshipRequestSerializer(friendship_request).data
+        return FriendshipRequestSerializer(relationship.request_from).data
 
     def get_friendship_request_to(self, user):
-        if not self.context['request'].user.is_authenticated:
-            return None
-        if self.context['request'].user.uuid == user.uuid:
+        relationship = self.get_relationship(user)
+        if not relationship or not relationship.request_to:
             return None
-        friendship_request = user.friendship_request_from(self.context['request'].user)
-        if not friendship_request:
-            return None
-        return FriendshipRequestSerializer(friendship_request).data
+        return FriendshipRequestSerializer(relationship.request_to).data
 
     def get_friendship(self, user):
-        if not self.context['request'].user.is_authenticated:
-            return None
-        if self.context['request'].user.uuid == user.uuid:
-            return None
-        friendship = user.friendship_with(self.context['request'].user)
-        if not friendship:
+        relationship = self.get_relationship(user)
+        if not relationship or not relationship.friendship:
             return None
-        return FriendshipSerializer(friendship).data
-
-    def get_friends_count(self, user):
-        return user.friends.count()
+        return FriendshipSerializer(relationship.friendship).data
 
 
 class FriendshipRequestSerializer(serializers.ModelSerializer):
@@ -90,3 +78,10 @@ class FriendshipSerializer(serializers.ModelSerializer):
     class Meta:
         model = Friendship
         fields = ['user', 'friend', 'created_at']
+
+
+class FriendSuggestionSerializer(serializers.ModelSerializer):
+    suggested = UserSerializer()
+    class Meta:
+        model = FriendSuggestion
+        fields = ['suggested', 'mutual_friends_count']
@@ -0,0 +1,15 @@
+import django.dispatch
+
+# Sent with `user` and `friend` once both Friendship rows of a pair are written.
+friendship_created = django.dispatch.Signal()
+
+# Sent with `user` and `friend` once both Friendship rows of a pair are deleted.
+friendship_removed = django.dispatch.Signal()
+
+# Sent with `instance` once a request is accepted or rejected by a conditional
+# update, which does not send post_save.
+friendship_request_answered = django.dispatch.Signal()
+
+# Sent with `instance` once a pending request is cancelled by its sender, which
+# post_delete can not tell apart from cascades and cleanups.
+friendship_request_cancelled = django.dispatch.Signal()
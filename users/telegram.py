@@ -0,0 +1,42 @@
+import hashlib
+import hmac
+import time
+from functools import lru_cache
+from urllib.parse import parse_qsl
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+@lru_cache
+def secret_key(token, c_str="WebAppData"):
+    return hmac.new(c_str.encode(), token.encode(), hashlib.sha256).digest()
+
+
+def validate_init_data(init_data, token):
+    """
+    Validates the data received from the Telegram web app, using the
+    method documented here:
+    https://core.telegram.org/bots/webapps#validating-data-received-via-the-web-app
+
+    Returns the decoded fields, or None when the hash does not match, the data
+    is older than TELEGRAM_AUTH_MAX_AGE seconds or its hash was already used.
+    """
+    fields = dict(parse_qsl(init_data, keep_blank_values=True))
+    hash_str = fields.pop('hash', '')
+    check_string = "\n".join(f"{key}={fields[key]}" for key in sorted(fields))
+    data_check = hmac.new(secret_key(token), check_string.encode(), hashlib.sha256)
+    if not hmac.compare_digest(data_check.hexdigest(), hash_str):
+        return None
+
+    try:
+        age = time.time() - int(fields['auth_date'])
+    except (KeyError, ValueError):
+        return None
+    if age > settings.TELEGRAM_AUTH_MAX_AGE:
+        return None
+
+    # The cache bounds the replay window to the data's remaining lifetime.
+    if not cache.add(f'telegram-login:{hash_str}', True, timeout=settings.TELEGRAM_AUTH_MAX_AGE - age):
+        return None
+    return fields
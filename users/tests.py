@@ -1,3 +1,495 @@
-from django.test import TestCase
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+import uuid
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
+from urllib.parse import urlencode
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from knox.models import AuthToken
+from rest_framework.test import APIClient
+
+from plans.models import Event
+from plans.views import UserEventsListView, AsyncUserEventsListView
+from users.checks import check_friendship_graph_cache
+from users.graph import FriendshipGraph, friendship_graph
+from users.models import User, Friendship, FriendshipRequest, FriendSuggestion
+from users.relationships import RelationshipResolver
+from users.telegram import secret_key
+from users.views import (
+    UserView, AsyncUserView, AuthUserView, AsyncAuthUserView, UserFriendsView, AsyncUserFriendsView,
+    UserFriendRequestsView, AsyncUserFriendRequestsView,
+)
+
+
+class RelationshipResolverTestCase(TestCase):
+    def setUp(self):
+        self.viewer = User.objects.create_user('viewer@example.com')
+        self.friend = User.objects.create_user('friend@example.com')
+        self.sender = User.objects.create_user('sender@example.com')
+        self.receiver = User.objects.create_user('receiver@example.com')
+        FriendshipRequest.objects.create(sender=self.viewer, receiver=self.friend).accept()
+        FriendshipRequest.objects.create(sender=self.sender, receiver=self.viewer)
+        FriendshipRequest.objects.create(sender=self.viewer, receiver=self.receiver)
+
+    def test_resolves_users_in_fixed_number_of_queries(self):
+        resolver = RelationshipResolver(self.viewer)
+        with self.assertNumQueries(2):
+            resolver.resolve([self.friend, self.sender, self.receiver])
+            friend = resolver.get(self.friend)
+            sender = resolver.get(self.sender)
+            receiver = resolver.get(self.receiver)
+        self.assertIsNotNone(friend.friendship)
+        self.assertIsNone(friend.request_from)
+        self.assertEqual(sender.request_from.sender, self.sender)
+        self.assertIsNone(sender.friendship)
+        self.assertEqual(receiver.request_to.receiver, self.receiver)
+        self.assertIsNone(resolver.get(self.viewer))
+
+    def test_user_view_query_count(self):
+        client = APIClient()
+        client.force_authenticate(self.viewer)
+        with self.assertNumQueries(3):
+            response = client.get(reverse('user_detail', kwargs={'user_uuid': self.sender.uuid}))
+        self.assertEqual(response.data['friendship_request_from']['sender']['uuid'], str(self.sender.uuid))
+        self.assertIsNone(response.data['friendship_request_to'])
+        self.assertIsNone(response.data['friendship'])
+
+
+class FriendshipRequestConstraintsTestCase(TestCase):
+    def setUp(self):
+        self.sender = User.objects.create_user('sender@example.com')
+        self.receiver = User.objects.create_user('receiver@example.com')
+
+    def test_duplicate_pending_request(self):
+        client = APIClient()
+        client.force_authenticate(self.sender)
+        url = reverse('user_detail', kwargs={'user_uuid': self.receiver.uuid})
+        response = client.post(url, {'action': 'send_request'})
+        self.assertEqual(response.status_code, 200)
+        response = client.post(url, {'action': 'send_request'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(FriendshipRequest.objects.count(), 1)
+
+    def test_request_can_be_resent_after_rejection(self):
+        FriendshipRequest.objects.create(sender=self.sender, receiver=self.receiver).reject()
+        FriendshipRequest.objects.create(sender=self.sender, receiver=self.receiver)
+        self.assertEqual(FriendshipRequest.objects.count(), 2)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Partial index plans are checked on PostgreSQL')
+    def test_pending_lookups_use_indexes(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        # The plain foreign key indexes would avoid a Seq Scan too, the plans
+        # must name the partial indexes on pending requests.
+        lookups = [
+            (self.receiver.received_friendship_requests_without_response(), ['friendship_req_pending_idx']),
+            (self.sender.sent_friendship_requests_without_response(), ['friendship_req_pending_unique']),
+            (self.sender.friendship_requests(), ['friendship_req_pending_idx', 'friendship_req_pending_unique']),
+            (
+                FriendshipRequest.objects.filter(sender=self.sender, receiver=self.receiver, accepted_at__isnull=True, rejected_at__isnull=True),
+                ['friendship_req_pending_unique'],
+            ),
+        ]
+        for queryset, indexes in lookups:
+            plan = queryset.explain()
+            for index in indexes:
+                self.assertIn(index, plan)
+
+
+class FriendshipActionsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        friendship_graph.clear()
+        self.user = User.objects.create_user('user@example.com')
+        self.other = User.objects.create_user('other@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('user_detail', kwargs={'user_uuid': self.other.uuid})
+
+    def post(self, action):
+        return self.client.post(self.url, {'action': action})
+
+    def assertRendersCurrentState(self, response):
+        self.assertEqual(response.status_code, 200)
+        cache.clear()
+        self.assertEqual(response.data, self.client.get(self.url).data)
+
+    def test_send_and_cancel(self):
+        response = self.post('send_request')
+        self.assertRendersCurrentState(response)
+        self.assertEqual(response.data['friendship_request_to']['receiver']['email'], 'other@example.com')
+        response = self.post('cancel_request')
+        self.assertRendersCurrentState(response)
+        self.assertIsNone(response.data['friendship_request_to'])
+        self.assertFalse(FriendshipRequest.objects.exists())
+        self.assertEqual(self.post('cancel_request').status_code, 400)
+
+    def test_accept(self):
+        FriendshipRequest.objects.create(sender=self.other, receiver=self.user)
+        with self.assertNumQueries(11):
+            response = self.post('accept_request')
+        self.assertRendersCurrentState(response)
+        self.assertEqual(response.data['friends_count'], 1)
+        self.assertEqual(response.data['friendship']['friend']['friends_count'], 1)
+        self.assertEqual(Friendship.objects.count(), 2)
+        self.assertEqual(self.post('accept_request').status_code, 400)
+
+    def test_reject(self):
+        FriendshipRequest.objects.create(sender=self.other, receiver=self.user)
+        with self.assertNumQueries(4):
+            response = self.post('reject_request')
+        self.assertRendersCurrentState(response)
+        self.assertIsNone(response.data['friendship_request_from'])
+        self.assertFalse(Friendship.objects.exists())
+
+    def test_remove(self):
+        FriendshipRequest.objects.create(sender=self.other, receiver=self.user).accept()
+        with self.assertNumQueries(9):
+            response = self.post('remove_from_friends')
+        self.assertRendersCurrentState(response)
+        self.assertEqual(response.data['friends_count'], 0)
+        self.assertFalse(Friendship.objects.exists())
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.friends_count, 0)
+        self.assertEqual(self.post('remove_from_friends').status_code, 400)
+
+    def test_stale_request_is_not_accepted_twice(self):
+        friendship_request = FriendshipRequest.objects.create(sender=self.other, receiver=self.user)
+        stale = FriendshipRequest.objects.get(pk=friendship_request.pk)
+        friendship_request.accept()
+        with self.assertRaisesMessage(ValueError, "Request already answered"):
+            stale.accept()
+        with self.assertRaisesMessage(ValueError, "Request already answered"):
+            stale.cancel()
+        self.assertEqual(Friendship.objects.count(), 2)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.friends_count, 1)
+
+    def test_friendship_is_created_once(self):
+        Friendship.objects.create(user=self.other, friend=self.user)
+        with self.assertRaisesMessage(ValueError, "Users are already friends"):
+            FriendshipRequest.objects.create(sender=self.other, receiver=self.user).accept()
+        self.assertEqual(Friendship.objects.count(), 1)
+        self.assertFalse(FriendshipRequest.objects.filter(accepted_at__isnull=False).exists())
+
+
+class FriendshipGraphTestCase(TestCase):
+    def setUp(self):
+        friendship_graph.clear()
+        self.alice = User.objects.create_user('alice@example.com')
+        self.bob = User.objects.create_user('bob@example.com')
+        self.carol = User.objects.create_user('carol@example.com')
+        FriendshipRequest.objects.create(sender=self.alice, receiver=self.bob).accept()
+        FriendshipRequest.objects.create(sender=self.carol, receiver=self.bob).accept()
+
+    def test_adjacency_is_cached(self):
+        with self.assertNumQueries(1):
+            self.assertTrue(friendship_graph.are_friends(self.alice.pk, self.bob.pk))
+            self.assertFalse(friendship_graph.are_friends(self.alice.pk, self.carol.pk))
+
+    def test_mutual_friends(self):
+        self.assertEqual(friendship_graph.mutual_friends(self.alice.pk, self.carol.pk), {self.bob.pk})
+
+    def test_invalidation(self):
+        self.assertFalse(friendship_graph.are_friends(self.alice.pk, self.carol.pk))
+        FriendshipRequest.objects.create(sender=self.alice, receiver=self.carol).accept()
+        self.assertTrue(friendship_graph.are_friends(self.alice.pk, self.carol.pk))
+        self.assertTrue(friendship_graph.are_friends(self.carol.pk, self.alice.pk))
+        self.alice.remove_friend(self.bob)
+        self.assertFalse(friendship_graph.are_friends(self.alice.pk, self.bob.pk))
+        self.assertFalse(friendship_graph.are_friends(self.bob.pk, self.alice.pk))
+
+    def test_invalidation_reaches_other_processes(self):
+        # Another worker's graph, sharing only the cache.
+        other = FriendshipGraph(maxsize=10)
+        self.assertTrue(other.are_friends(self.alice.pk, self.bob.pk))
+        self.alice.remove_friend(self.bob)
+        self.assertFalse(other.are_friends(self.alice.pk, self.bob.pk))
+        self.assertFalse(other.are_friends(self.bob.pk, self.alice.pk))
+
+    def test_lru_eviction(self):
+        graph = FriendshipGraph(maxsize=1)
+        graph.friends_of(self.alice.pk)
+        graph.friends_of(self.bob.pk)
+        with self.assertNumQueries(1):
+            graph.friends_of(self.alice.pk)
+
+    def test_process_local_cache_is_reported(self):
+        self.assertEqual([error.id for error in check_friendship_graph_cache(None)], ['users.W001'])
+        shared = {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cache'}
+        with override_settings(CACHES={**settings.CACHES, 'shared': shared}, FRIENDSHIP_GRAPH_CACHE='shared'):
+            self.assertEqual(check_friendship_graph_cache(None), [])
+
+
+class UserFriendsViewTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('user@example.com')
+        self.friends = [User.objects.create_user(f'friend{i}@example.com') for i in range(3)]
+        for friend in self.friends:
+            FriendshipRequest.objects.create(sender=friend, receiver=self.user).accept()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_pages_newest_friendships_first(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('my_friends'), {'page_size': 2})
+        self.assertEqual([row['email'] for row in response.data['results']], ['friend2@example.com', 'friend1@example.com'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([row['email'] for row in response.data['results']], ['friend0@example.com'])
+        self.assertIsNone(response.data['next'])
+
+    @skipUnless(connection.vendor == 'postgresql', 'Index plans are checked on PostgreSQL')
+    def test_pages_use_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = Friendship.objects.filter(user=self.user).order_by('-created_at', '-pk')[:51].explain()
+        self.assertIn('friendship_user_created_idx', plan)
+        self.assertNotIn('Sort', plan)
+
+
+class FriendSuggestionsTestCase(TestCase):
+    def setUp(self):
+        friendship_graph.clear()
+        self.alice = User.objects.create_user('alice@example.com')
+        self.bob = User.objects.create_user('bob@example.com')
+        self.carol = User.objects.create_user('carol@example.com')
+        self.dave = User.objects.create_user('dave@example.com')
+        self.erin = User.objects.create_user('erin@example.com')
+        for sender, receiver in [(self.alice, self.bob), (self.alice, self.carol), (self.bob, self.dave), (self.carol, self.dave), (self.carol, self.erin)]:
+            FriendshipRequest.objects.create(sender=sender, receiver=receiver).accept()
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def get_suggestions(self):
+        response = self.client.get(reverse('my_friend_suggestions'))
+        return [(suggestion['suggested']['email'], suggestion['mutual_friends_count']) for suggestion in response.data]
+
+    def test_live_suggestions(self):
+        self.assertEqual(self.get_suggestions(), [('dave@example.com', 2), ('erin@example.com', 1)])
+
+    @override_settings(FRIEND_SUGGESTIONS_MAX_EDGES=1)
+    def test_traversal_is_capped(self):
+        self.assertEqual(sum(count for pk, count in friendship_graph.suggest_friends(self.alice.pk, 10)), 1)
+
+    def test_precomputed_suggestions(self):
+        call_command('rebuild_friend_suggestions', stdout=StringIO())
+        self.assertEqual(FriendSuggestion.objects.filter(user=self.alice).count(), 2)
+        FriendshipRequest.objects.create(sender=self.alice, receiver=self.dave).accept()
+        with self.assertNumQueries(2):
+            self.assertEqual(self.get_suggestions(), [('erin@example.com', 1)])
+
+    def test_mutual_friends(self):
+        response = self.client.get(reverse('user_mutual_friends', kwargs={'user_uuid': self.dave.uuid}))
+        self.assertEqual({user['email'] for user in response.data['results']}, {'bob@example.com', 'carol@example.com'})
+
+
+class CachedTokenAuthenticationTestCase(TestCase):
+    def setUp(self):
+        caches[settings.KNOX_TOKEN_CACHE].clear()
+        self.user = User.objects.create_user('user@example.com')
+        self.instance, token = AuthToken.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+
+    def test_token_is_cached(self):
+        self.assertEqual(self.client.get(reverse('my_detail')).status_code, 200)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('my_detail'))
+        self.assertEqual(response.data['email'], 'user@example.com')
+
+    def test_logout_invalidates_cached_token(self):
+        self.assertEqual(self.client.get(reverse('my_detail')).status_code, 200)
+        self.assertEqual(self.client.post(reverse('knox_logoutall')).status_code, 204)
+        self.assertEqual(self.client.get(reverse('my_detail')).status_code, 401)
+
+    def test_inactive_user(self):
+        self.assertEqual(self.client.get(reverse('my_detail')).status_code, 200)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get(reverse('my_detail')).status_code, 401)
+
+    def test_prune_auth_tokens(self):
+        for _ in range(3):
+            AuthToken.objects.create(user=self.user)
+        AuthToken.objects.create(user=self.user, expiry=timedelta(seconds=-1))
+        call_command('prune_auth_tokens', keep=2, stdout=StringIO())
+        self.assertEqual(AuthToken.objects.filter(user=self.user).count(), 2)
+
+
+class ResponseCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('user@example.com')
+        self.friend = User.objects.create_user('friend@example.com')
+        FriendshipRequest.objects.create(sender=self.user, receiver=self.friend).accept()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_not_modified(self):
+        response = self.client.get(reverse('my_detail'))
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('my_detail'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_repeated_polls_are_served_from_cache(self):
+        url = reverse('user_detail', kwargs={'user_uuid': self.friend.uuid})
+        expected = self.client.get(url).data
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.data, expected)
+
+    def test_friendship_changes_invalidate(self):
+        url = reverse('user_detail', kwargs={'user_uuid': self.friend.uuid})
+        etag = self.client.get(url)['ETag']
+        self.user.remove_friend(self.friend)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data['friendship'])
+        self.assertEqual(response.data['friends_count'], 0)
+
+        FriendshipRequest.objects.create(sender=self.friend, receiver=self.user)
+        self.assertIsNotNone(self.client.get(url).data['friendship_request_from'])
+
+    def test_friend_profile_changes_invalidate_friends_list(self):
+        self.assertEqual(self.client.get(reverse('my_friends')).data['results'][0]['first_name'], '')
+        self.friend.first_name = 'Ann'
+        self.friend.save()
+        self.assertEqual(self.client.get(reverse('my_friends')).data['results'][0]['first_name'], 'Ann')
+
+    def test_profile_changes_invalidate_friends_lists_with_a_stale_graph(self):
+        self.client.get(reverse('my_friends'))
+        # The graph of a process that has not seen the friendship yet.
+        with mock.patch.object(friendship_graph, 'friends_of', return_value=frozenset()):
+            self.friend.first_name = 'Ann'
+            self.friend.save()
+        self.assertEqual(self.client.get(reverse('my_friends')).data['results'][0]['first_name'], 'Ann')
+
+    @override_settings(RESPONSE_CACHE_FANOUT_LIMIT=0)
+    def test_profile_changes_of_popular_users_do_not_fan_out(self):
+        self.client.get(reverse('my_friends'))
+        with mock.patch('app.response_cache.bump') as bump:
+            self.friend.first_name = 'Ann'
+            self.friend.save()
+        bump.assert_called_once_with(f'user:{self.friend.pk}')
+
+    def test_viewers_do_not_share_responses(self):
+        self.client.get(reverse('my_detail'))
+        self.client.force_authenticate(self.friend)
+        self.assertEqual(self.client.get(reverse('my_detail')).data['email'], 'friend@example.com')
+
+
+class AsyncViewsTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('user@example.com')
+        self.friend = User.objects.create_user('friend@example.com')
+        self.sender = User.objects.create_user('sender@example.com')
+        FriendshipRequest.objects.create(sender=self.user, receiver=self.friend).accept()
+        FriendshipRequest.objects.create(sender=self.sender, receiver=self.user, comment='Hi')
+        Event.objects.create(creator=self.user, title='Party')
+        self.token = AuthToken.objects.create(user=self.user)[1]
+
+    def get(self, view_class, name, token=None, **kwargs):
+        cache.clear()
+        request = RequestFactory().get(reverse(name, kwargs=kwargs), HTTP_AUTHORIZATION=f'Token {token or self.token}')
+        view = view_class.as_view()
+        if iscoroutinefunction(view):
+            return async_to_sync(view)(request, **kwargs)
+        return view(request, **kwargs).render()
+
+    def test_responses_match_sync_views(self):
+        views = [
+            ('my_detail', AuthUserView, AsyncAuthUserView, {}),
+            ('my_friends', UserFriendsView, AsyncUserFriendsView, {}),
+            ('my_friends_requests', UserFriendRequestsView, AsyncUserFriendRequestsView, {}),
+            ('my_events', UserEventsListView, AsyncUserEventsListView, {}),
+            ('user_detail', UserView, AsyncUserView, {'user_uuid': self.sender.uuid}),
+            ('user_detail', UserView, AsyncUserView, {'user_uuid': uuid.uuid4()}),
+        ]
+        for name, sync_view, async_view, kwargs in views:
+            with self.subTest(name, **kwargs):
+                expected = self.get(sync_view, name, **kwargs)
+                response = self.get(async_view, name, **kwargs)
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(response.content, expected.content)
+                self.assertEqual(response['Content-Type'], expected['Content-Type'])
+
+    def test_cache_is_not_called_on_the_event_loop(self):
+        def off_the_loop(method):
+            def wrapper(*args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                except RuntimeError:
+                    return method(*args, **kwargs)
+                raise AssertionError(f"{method.__name__} blocked the event loop")
+            return wrapper
+
+        backend = type(caches[settings.RESPONSE_CACHE])
+        for name in ('get', 'get_many', 'set', 'add'):
+            self.enterContext(mock.patch.object(backend, name, off_the_loop(getattr(backend, name))))
+        for name, kwargs in [('my_detail', {}), ('user_detail', {'user_uuid': self.sender.uuid})]:
+            view = AsyncUserView if kwargs else AsyncAuthUserView
+            for _ in range(2):
+                request = RequestFactory().get(reverse(name, kwargs=kwargs), HTTP_AUTHORIZATION=f'Token {self.token}')
+                self.assertEqual(async_to_sync(view.as_view())(request, **kwargs).status_code, 200)
+
+    def test_bad_token(self):
+        expected = self.get(AuthUserView, 'my_detail', token='bad')
+        response = self.get(AsyncAuthUserView, 'my_detail', token='bad')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(response['WWW-Authenticate'], expected['WWW-Authenticate'])
+
+    def test_post_goes_to_sync_view(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post(reverse('user_detail', kwargs={'user_uuid': self.sender.uuid}), {'action': 'accept_request'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.data['friendship'])
+
+
+class TelegramLoginViewTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def sign(self, auth_date, user_id=42):
+        user = json.dumps({'id': user_id, 'first_name': 'Ann'})
+        fields = {'auth_date': str(auth_date), 'query_id': 'AAE', 'user': user}
+        check_string = '\n'.join(f'{key}={fields[key]}' for key in sorted(fields))
+        fields['hash'] = hmac.new(secret_key(settings.TELEGRAM_BOT_TOKEN), check_string.encode(), hashlib.sha256).hexdigest()
+        return urlencode(fields)
+
+    def login(self, user_data):
+        return APIClient().post(reverse('telegram_login'), {'user_data': user_data})
+
+    def test_login_creates_user_once(self):
+        self.assertEqual(self.login(self.sign(int(time.time()))).status_code, 200)
+        self.assertEqual(self.login(self.sign(int(time.time()) - 1)).status_code, 200)
+        user = User.objects.get(telegram_id=42)
+        self.assertEqual(user.first_name, 'Ann')
+        self.assertEqual(user.last_name, '')
+
+    def test_replay_is_rejected(self):
+        user_data = self.sign(int(time.time()))
+        self.assertEqual(self.login(user_data).status_code, 200)
+        self.assertEqual(self.login(user_data).status_code, 400)
+
+    def test_stale_data_is_rejected(self):
+        self.assertEqual(self.login(self.sign(int(time.time()) - settings.TELEGRAM_AUTH_MAX_AGE - 1)).status_code, 400)
+
+    def test_bad_hash_is_rejected(self):
+        user_data = self.sign(int(time.time())).replace('Ann', 'Bob')
+        self.assertEqual(self.login(user_data).status_code, 400)
+        self.assertEqual(self.login('').status_code, 400)
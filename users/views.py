@@ -1,20 +1,25 @@
-import hmac
-import hashlib
 import json
-from urllib import parse
-from urllib.parse import unquote, urlparse
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.auth import login
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
 
 from rest_framework import permissions, status
 from rest_framework.authtoken.serializers import AuthTokenSerializer
 from rest_framework.generics import RetrieveAPIView, ListAPIView
 from rest_framework.response import Response
 
+from app.async_views import AsyncAPIView, AsyncListAPIView, AsyncRetrieveAPIView
+from app.fast_serializers import ValuesSerializer, ValuesListMixin
+from app.response_cache import CachedResponseMixin
 from users.forms import FriendshipAction
-from users.models import User, FriendshipRequest
-from users.serializers import DetailUserSerializer, UserSerializer, FriendshipRequestSerializer
+from users.graph import friendship_graph
+from users.models import User, Friendship, FriendshipRequest, FriendSuggestion
+from users.relationships import Relationship, RelationshipResolver
+from users.serializers import DetailUserSerializer, UserSerializer, FriendshipRequestSerializer, FriendSuggestionSerializer
+from users.telegram import validate_init_data
 
 from knox.views import LoginView as KnoxLoginView
 
@@ -26,56 +31,23 @@ class TelegramLoginView(KnoxLoginView):
         if request.user.is_authenticated:
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
-        tg_data = parse.parse_qs(request.data.get('user_data'))
-
-        try:
-            hash_str = tg_data['hash'][0]
-        except KeyError:
-            return Response(status=status.HTTP_400_BAD_REQUEST)
-
-        if not self.validate(hash_str, request.data.get('user_data'), settings.TELEGRAM_BOT_TOKEN):
+        tg_data = validate_init_data(request.data.get('user_data') or '', settings.TELEGRAM_BOT_TOKEN)
+        if tg_data is None or 'user' not in tg_data:
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
-        user_data = json.loads(tg_data['user'][0])
-        telegram_id = user_data['id']
-        try:
-            user = User.objects.get(telegram_id=telegram_id)
-        except User.DoesNotExist:
-            user = User.objects.create(
-                email=f'{user_data['id']}@telegram.org',
-                is_email_faked=True,
-                telegram_id=user_data['id'],
-                first_name=user_data['first_name'],
-                last_name=user_data['last_name'],
-            )
+        user_data = json.loads(tg_data['user'])
+        user, created = User.objects.get_or_create(
+            telegram_id=user_data['id'],
+            defaults={
+                'email': f'{user_data['id']}@telegram.org',
+                'is_email_faked': True,
+                'first_name': user_data.get('first_name', ''),
+                'last_name': user_data.get('last_name', ''),
+            },
+        )
         login(request, user)
         return super(TelegramLoginView, self).post(request, format=format)
 
-    def validate(self, hash_str, init_data, token, c_str="WebAppData"):
-        """
-        Validates the data received from the Telegram web app, using the
-        method documented here:
-        https://core.telegram.org/bots/webapps#validating-data-received-via-the-web-app
-
-        hash_str - the has string passed by the webapp
-        init_data - the query string passed by the webapp
-        token - Telegram bot's token
-        c_str - constant string (default = "WebAppData")
-        """
-
-        init_data = sorted([chunk.split("=")
-                            for chunk in unquote(init_data).split("&")
-                            if chunk[:len("hash=")] != "hash="],
-                           key=lambda x: x[0])
-        init_data = "\n".join([f"{rec[0]}={rec[1]}" for rec in init_data])
-
-        secret_key = hmac.new(c_str.encode(), token.encode(),
-                              hashlib.sha256).digest()
-        data_check = hmac.new(secret_key, init_data.encode(),
-                              hashlib.sha256)
-
-        return data_check.hexdigest() == hash_str
-
 
 class LoginView(KnoxLoginView):
     permission_classes = (permissions.AllowAny,)
@@ -91,7 +63,11 @@ class LoginView(KnoxLoginView):
         return super(LoginView, self).post(request, format=format)
 
 
-class UserView(RetrieveAPIView):
+def user_pk_cache_key(user_uuid):
+    return f'user-pk:{user_uuid}'
+
+
+class UserView(CachedResponseMixin, RetrieveAPIView):
     model = User
     serializer_class = DetailUserSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -99,47 +75,67 @@ class UserView(RetrieveAPIView):
     lookup_field = 'uuid'
     queryset = User.objects.all()
 
+    def get_cache_scopes(self):
+        # The uuid of a user never changes, its primary key is remembered for good.
+        cache = caches[settings.RESPONSE_CACHE]
+        user_uuid = self.kwargs['user_uuid']
+        pk = cache.get(user_pk_cache_key(user_uuid))
+        if pk is None:
+            pk = User.objects.filter(uuid=user_uuid).values_list('pk', flat=True).first()
+            if pk is None:
+                return None
+            cache.set(user_pk_cache_key(user_uuid), pk, None)
+        return [f'user:{self.request.user.pk}', f'user:{pk}']
+
     def post(self, request, *args, **kwargs):
         form = FriendshipAction(request.data)
         if form.is_valid():
             user = self.get_object()
-            friendship = user.friendship_with(request.user)
-            reversed_friendship = request.user.friendship_with(user)
-            if form.cleaned_data['action'] == 'remove_from_friends':
-                if not friendship and not reversed_friendship:
+            # Loaded once, changed along with the rows and rendered without reading them again.
+            relationships = RelationshipResolver(request.user)
+            relationship = relationships.get(user) or Relationship()
+            action = form.cleaned_data['action']
+            if action == 'remove_from_friends':
+                if not relationship.friendship:
                     return Response({'message': 'You are not friends with this user'}, status=status.HTTP_400_BAD_REQUEST)
-                friendship.delete()
-                reversed_friendship.delete()
-            if form.cleaned_data['action'] == 'send_request':
-                if friendship or reversed_friendship:
-                    return Response({'message': 'You are already friends with this user'}, status=status.HTTP_400_BAD_REQUEST)
-                FriendshipRequest.objects.create(
-                    sender=self.request.user,
-                    receiver=user,
-                    comment=form.cleaned_data['comment'],
-                )
-            if form.cleaned_data['action'] == 'cancel_request':
-                if friendship or reversed_friendship:
-                    return Response({'message': 'You are already friends with this user'}, status=status.HTTP_400_BAD_REQUEST)
-                friendship_request = user.friendship_request_from(self.request.user)
-                if not friendship_request:
+                request.user.remove_friend(user)
+                relationship.friendship = None
+            elif relationship.friendship:
+                return Response({'message': 'You are already friends with this user'}, status=status.HTTP_400_BAD_REQUEST)
+            if action == 'send_request':
+                try:
+                    with transaction.atomic():
+                        relationship.request_to = FriendshipRequest.objects.create(
+                            sender=self.request.user,
+                            receiver=user,
+                            comment=form.cleaned_data['comment'],
+                        )
+                except IntegrityError:
+                    return Response({'message': 'You have already sent a friendship request to this user'}, status=status.HTTP_400_BAD_REQUEST)
+            if action == 'cancel_request':
+                if not relationship.request_to:
                     return Response({'message': 'You have not sent a friendship request to this user'}, status=status.HTTP_400_BAD_REQUEST)
-                friendship_request.delete()
-            if form.cleaned_data['action'] == 'accept_request':
-                if friendship or reversed_friendship:
-                    return Response({'message': 'You are already friends with this user'}, status=status.HTTP_400_BAD_REQUEST)
-                friendship_request = request.user.friendship_request_from(user)
-                if not friendship_request:
-                    return Response({'message': 'You have not a friendship request from this user'}, status=status.HTTP_400_BAD_REQUEST)
-                friendship_request.accept()
-            if form.cleaned_data['action'] == 'reject_request':
-                if friendship or reversed_friendship:
-                    return Response({'message': 'You are already friends with this user'}, status=status.HTTP_400_BAD_REQUEST)
-                friendship_request = request.user.friendship_request_from(user)
+                try:
+                    relationship.request_to.cancel()
+                except ValueError as e:
+                    return Response({'message': str(e)}, status=status.HTTP_409_CONFLICT)
+                relationship.request_to = None
+            if action in ('accept_request', 'reject_request'):
+                friendship_request = relationship.request_from
                 if not friendship_request:
                     return Response({'message': 'You have not a friendship request from this user'}, status=status.HTTP_400_BAD_REQUEST)
-                friendship_request.reject()
-            return self.retrieve(request, *args, **kwargs)
+                # The rendered instances, so that accepting updates their friends counts.
+                friendship_request.sender, friendship_request.receiver = user, request.user
+                try:
+                    if action == 'accept_request':
+                        relationship.friendship = friendship_request.accept()[0]
+                    else:
+                        friendship_request.reject()
+                except ValueError as e:
+                    return Response({'message': str(e)}, status=status.HTTP_409_CONFLICT)
+                relationship.request_from = None
+            context = {**self.get_serializer_context(), 'relationships': relationships}
+            return Response(self.get_serializer(user, context=context).data)
         else:
             return Response(form.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -149,22 +145,132 @@ class AuthUserView(UserView):
     def get_object(self):
         return self.request.user
 
+    def get_cache_scopes(self):
+        return [f'user:{self.request.user.pk}']
 
-class UserFriendsView(ListAPIView):
+
+class UserFriendsView(CachedResponseMixin, ValuesListMixin, ListAPIView):
+    """
+    The friends of the user, paged over their Friendship rows newest first, a
+    range scan on the (user, created_at, id) index whatever the page.
+    """
     serializer_class = UserSerializer
+    values_serializer = ValuesSerializer(UserSerializer, 'friend__')
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_cache_scopes(self):
+        return [f'user:{self.request.user.pk}', f'friends:{self.request.user.pk}']
+
     def get_queryset(self):
         if not self.request.user.is_authenticated:
-            return User.objects.none()
-        return self.request.user.friends.all()
+            return Friendship.objects.none()
+        return Friendship.objects.filter(user=self.request.user)
 
 
-class UserFriendRequestsView(ListAPIView):
+class UserFriendRequestsView(ValuesListMixin, ListAPIView):
     serializer_class = FriendshipRequestSerializer
+    values_serializer = ValuesSerializer(FriendshipRequestSerializer)
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         if not self.request.user.is_authenticated:
             return FriendshipRequest.objects.none()
-        return self.request.user.friendship_requests()
+        return self.request.user.friendship_requests().select_related('sender', 'receiver')
+
+
+class UserFriendSuggestionsView(ListAPIView):
+    serializer_class = FriendSuggestionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+    limit = 20
+
+    def get_queryset(self):
+        user = self.request.user
+        friends = friendship_graph.friends_of(user.pk)
+        precomputed = user.friend_suggestions.select_related('suggested').order_by('-mutual_friends_count')
+        suggestions = [suggestion for suggestion in precomputed[:self.limit * 2] if suggestion.suggested_id not in friends]
+        if suggestions:
+            return suggestions[:self.limit]
+
+        # Not rebuilt yet for this user, run the bounded traversal instead.
+        ranked = friendship_graph.suggest_friends(user.pk, self.limit)
+        users = User.objects.in_bulk([pk for pk, count in ranked])
+        return [
+            FriendSuggestion(user=user, suggested=users[pk], mutual_friends_count=count)
+            for pk, count in ranked if pk in users
+        ]
+
+
+class UserMutualFriendsView(ValuesListMixin, ListAPIView):
+    serializer_class = UserSerializer
+    values_serializer = ValuesSerializer(UserSerializer)
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        mutual_friends = friendship_graph.mutual_friends(self.request.user.pk, self.kwargs['user_uuid'])
+        return User.objects.filter(pk__in=mutual_friends)
+
+
+class AsyncUserView(AsyncRetrieveAPIView):
+    serializer_class = DetailUserSerializer
+    lookup_url_kwarg = 'user_uuid'
+    lookup_field = 'uuid'
+    # Friendship actions are written by the synchronous view.
+    sync_view = staticmethod(UserView.as_view())
+
+    def get_queryset(self):
+        return User.objects.all()
+
+    async def get_cache_scopes(self):
+        cache = caches[settings.RESPONSE_CACHE]
+        user_uuid = self.kwargs['user_uuid']
+        pk = await cache.aget(user_pk_cache_key(user_uuid))
+        if pk is None:
+            pk = await User.objects.filter(uuid=user_uuid).values_list('pk', flat=True).afirst()
+            if pk is None:
+                return None
+            await cache.aset(user_pk_cache_key(user_uuid), pk, None)
+        return [f'user:{self.request.user.pk}', f'user:{pk}']
+
+    async def get_data(self):
+        user = await self.get_object()
+        context = self.get_serializer_context()
+        context['relationships'] = RelationshipResolver(self.request.user)
+        await context['relationships'].aresolve([user])
+        return self.serializer_class(user, context=context).data
+
+    async def post(self, request, *args, **kwargs):
+        return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+
+
+class AsyncAuthUserView(AsyncAPIView):
+    serializer_class = UserSerializer
+    sync_view = staticmethod(AuthUserView.as_view())
+
+    async def get_cache_scopes(self):
+        return [f'user:{self.request.user.pk}']
+
+    async def get_data(self):
+        return self.serializer_class(self.request.user, context=self.get_serializer_context()).data
+
+    async def post(self, request, *args, **kwargs):
+        return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+
+
+class AsyncUserFriendsView(AsyncListAPIView):
+    serializer_class = UserSerializer
+    values_serializer = UserFriendsView.values_serializer
+
+    def get_queryset(self):
+        return Friendship.objects.filter(user=self.request.user)
+
+    async def get_cache_scopes(self):
+        return [f'user:{self.request.user.pk}', f'friends:{self.request.user.pk}']
+
+
+class AsyncUserFriendRequestsView(AsyncListAPIView):
+    serializer_class = FriendshipRequestSerializer
+    values_serializer = UserFriendRequestsView.values_serializer
+
+    def get_queryset(self):
+        return self.request.user.friendship_requests().select_related('sender', 'receiver')